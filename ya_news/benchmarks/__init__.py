@@ -0,0 +1 @@
+"""Замеры производительности YaNews, запускаются вручную через python -m."""
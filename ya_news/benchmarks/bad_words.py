@@ -0,0 +1,60 @@
+"""
+Сравнение проверки запрещённых слов: цикл по списку и общий шаблон.
+
+Запуск из каталога ya_news:
+    python -m benchmarks.bad_words
+"""
+import random
+import timeit
+
+from news.moderation import build_pattern
+
+ALPHABET = 'абвгдежзийклмнопрстуфхцчшщъыьэюя'
+WORD_COUNTS = (10, 1_000, 10_000)
+TEXT_LENGTH = 4_000
+REPEAT = 20
+
+
+def random_word(rng):
+    return ''.join(rng.choice(ALPHABET) for _ in range(rng.randint(5, 10)))
+
+
+def loop_search(words, text):
+    lowered_text = text.lower()
+    for word in words:
+        if word in lowered_text:
+            return True
+    return False
+
+
+def main():
+    rng = random.Random(0)
+    # Чистый текст — худший случай: проверять приходится все слова.
+    text = ' '.join(
+        'слово' for _ in range(TEXT_LENGTH // len('слово '))
+    )
+    print(f'Текст: {len(text)} символов, замеров: {REPEAT}')
+    print(
+        f'{"слов":>8} {"цикл, мс":>12} '
+        f'{"шаблон, мс":>12} {"сборка, мс":>12}'
+    )
+    for count in WORD_COUNTS:
+        words = [random_word(rng) for _ in range(count)]
+        build_time = timeit.timeit(lambda: build_pattern(words), number=1)
+        pattern = build_pattern(words)
+        assert not loop_search(words, text)
+        assert not pattern.search(text.lower())
+        loop_time = timeit.timeit(
+            lambda: loop_search(words, text), number=REPEAT
+        ) / REPEAT
+        pattern_time = timeit.timeit(
+            lambda: pattern.search(text.lower()), number=REPEAT
+        ) / REPEAT
+        print(
+            f'{count:>8} {loop_time * 1000:>12.3f} '
+            f'{pattern_time * 1000:>12.3f} {build_time * 1000:>12.1f}'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""
+Накладные расходы маршрутизации GET/POST на странице новости.
+
+Сравнивает прежний NewsDetailView, который вызывал as_view()
+на каждый запрос, с текущим, где представления собраны заранее.
+Сами NewsDetail и NewsComment подменяются заглушкой, поэтому
+в замер попадает только диспетчеризация, без базы и шаблонов.
+
+Запуск из каталога ya_news:
+    python -m benchmarks.detail_dispatch
+"""
+import os
+import timeit
+from unittest import mock
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yanews.settings')
+django.setup()
+
+from django.http import HttpResponse  # noqa: E402
+from django.test import RequestFactory  # noqa: E402
+from django.views import generic  # noqa: E402
+
+from news import views  # noqa: E402
+
+NUMBER = 20_000
+
+
+class LegacyNewsDetailView(generic.View):
+
+    def get(self, request, *args, **kwargs):
+        view = views.NewsDetail.as_view()
+        return view(request, *args, **kwargs)
+
+    def post(self, request, *args, **kwargs):
+        view = views.NewsComment.as_view()
+        return view(request, *args, **kwargs)
+
+
+def stub_dispatch(self, request, *args, **kwargs):
+    return HttpResponse()
+
+
+def measure(view, request):
+    seconds = timeit.timeit(lambda: view(request, pk=1), number=NUMBER)
+    return seconds / NUMBER * 1_000_000
+
+
+def main():
+    factory = RequestFactory()
+    requests = (
+        ('GET', factory.get('/news/1/')),
+        ('POST', factory.post('/news/1/', {'text': 'Текст'})),
+    )
+    legacy_view = LegacyNewsDetailView.as_view()
+    current_view = views.NewsDetailView.as_view()
+    print(f'Запросов на замер: {NUMBER}')
+    print(f'{"метод":>6} {"было, мкс":>12} {"стало, мкс":>12}')
+    with mock.patch.object(views.NewsDetail, 'dispatch', stub_dispatch), \
+            mock.patch.object(views.NewsComment, 'dispatch', stub_dispatch):
+        for method, request in requests:
+            legacy = measure(legacy_view, request)
+            current = measure(current_view, request)
+            print(f'{method:>6} {legacy:>12.2f} {current:>12.2f}')
+
+
+if __name__ == '__main__':
+    main()
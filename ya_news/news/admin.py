@@ -1,15 +1,73 @@
-from django.contrib import admin
+from django.conf import settings
+from django.contrib import admin, messages
+from django.db.models import Sum
+from django.forms.models import BaseInlineFormSet
 
 from .models import Comment, News
+from .purge import purge_news
+from .sharding import is_sharded, shard_for_news
+
+
+class CommentFormSet(BaseInlineFormSet):
+    """Комментарии новости читаются из шарда, где они лежат."""
+
+    def __init__(self, *args, instance=None, queryset=None, **kwargs):
+        if (
+            is_sharded() and queryset is not None
+            and instance is not None and instance.pk is not None
+        ):
+            queryset = queryset.using(shard_for_news(instance.pk))
+        super().__init__(
+            *args, instance=instance, queryset=queryset, **kwargs
+        )
 
 
 class CommentInline(admin.StackedInline):
     model = Comment
+    formset = CommentFormSet
     extra = 0
 
 
 @admin.register(News)
 class NewsAdmin(admin.ModelAdmin):
+    list_display = ('title', 'date', 'comment_count', 'archived_count')
+    readonly_fields = ('comment_count', 'archived_count')
     inlines = [
         CommentInline,
     ]
+    actions = ('purge_selected',)
+
+    @admin.action(
+        description='Удалить выбранные новости с комментариями пачками',
+        permissions=('delete',),
+    )
+    def purge_selected(self, request, queryset):
+        """
+        В отличие от стандартного удаления не загружает все комментарии
+        и не держит одну длинную транзакцию. Удаление идёт прямо
+        в запросе админки, поэтому здесь удаляются только небольшие
+        выборки, а большие — командой purge_news.
+        """
+        limit = settings.NEWS_ADMIN_PURGE_MAX_COMMENTS
+        total = queryset.aggregate(
+            total=Sum('comment_count')
+        )['total'] or 0
+        if total > limit:
+            ids = ' '.join(
+                str(pk) for pk in queryset.values_list('pk', flat=True)
+            )
+            self.message_user(
+                request,
+                f'У выбранных новостей {total} комментариев, в админке '
+                f'можно удалить не больше {limit}. Удалите их командой '
+                f'manage.py purge_news {ids}',
+                messages.ERROR,
+            )
+            return
+        for news in queryset:
+            deleted = purge_news(news)
+            self.message_user(
+                request,
+                f'Новость «{news.title}» удалена, комментариев: {deleted}.',
+                messages.SUCCESS,
+            )
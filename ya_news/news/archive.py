@@ -0,0 +1,103 @@
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+
+from .cache import invalidate_news_pages
+from .models import ArchivedComment, Comment, CommentRow, News
+from .sharding import comment_shards
+
+CHUNK_SIZE = 500
+FIELDS = ('pk', 'news_id', 'author_id', 'text', 'created')
+
+
+def archive_chunk(rows, using):
+    """
+    Переносит пачку комментариев шарда using в архив.
+
+    Копия и счётчики новостей пишутся в основную базу, затем строки
+    удаляются из рабочей таблицы через CommentRow без сигналов:
+    comment_count не меняется, потому что считает и архивные
+    комментарии. Для основной базы всё это одна транзакция.
+    Для шарда — две; если перенос прервётся между ними, строки,
+    уже попавшие в архив, при повторе только удалятся из шарда,
+    а на странице новости такие копии не видны: рабочая таблица
+    читается после архива. Копией считается архивная строка с тем же
+    id и теми же (news_id, author_id, created); если под этим id
+    в архиве другой комментарий, строка остаётся в рабочей таблице.
+    Возвращает {news_id: сколько перенесено} и id таких конфликтов.
+    """
+    pks = [row[0] for row in rows]
+    with transaction.atomic(using=using), transaction.atomic():
+        archived = {
+            pk: key for pk, *key in ArchivedComment.objects.filter(
+                pk__in=pks
+            ).values_list('pk', 'news_id', 'author_id', 'created')
+        }
+        fresh = [row for row in rows if row[0] not in archived]
+        conflicts = [
+            pk for pk, news_id, author_id, _, created in rows
+            if pk in archived
+            and archived[pk] != [news_id, author_id, created]
+        ]
+        ArchivedComment.objects.bulk_create(
+            ArchivedComment(
+                id=pk, news_id=news_id, author_id=author_id,
+                text=text, created=created,
+            )
+            for pk, news_id, author_id, text, created in fresh
+        )
+        counts = Counter(row[1] for row in fresh)
+        if counts:
+            News.objects.filter(pk__in=counts).update(
+                archived_count=F('archived_count') + Case(
+                    *(When(pk=news_id, then=Value(count))
+                      for news_id, count in counts.items()),
+                    default=Value(0),
+                ),
+                modified=timezone.now(),
+            )
+        CommentRow.objects.using(using).filter(pk__in=pks).exclude(
+            pk__in=conflicts
+        ).delete()
+    for news_id in counts:
+        invalidate_news_pages(news_id)
+    return counts, conflicts
+
+
+def archive_comments(older_than, chunk_size=CHUNK_SIZE, progress=None,
+                     conflict=None):
+    """
+    Переносит в архив комментарии старше older_than (timedelta).
+
+    Шарды обходятся по очереди, комментарии — по возрастанию id
+    пачками по chunk_size. progress(archived) вызывается после
+    каждой пачки, conflict(using, pk) — для комментария, который
+    не перенесён, потому что его id в архиве занят другим
+    комментарием. Возвращает число перенесённых комментариев.
+    """
+    cutoff = timezone.now() - older_than
+    total = 0
+    for using in comment_shards():
+        comments = Comment.objects.using(using).filter(
+            created__lt=cutoff
+        ).order_by('pk')
+        after_pk = 0
+        while True:
+            rows = list(
+                comments.filter(pk__gt=after_pk).values_list(
+                    *FIELDS
+                )[:chunk_size]
+            )
+            if not rows:
+                break
+            after_pk = rows[-1][0]
+            _, conflicts = archive_chunk(rows, using)
+            for pk in conflicts:
+                if conflict:
+                    conflict(using, pk)
+            total += len(rows) - len(conflicts)
+            if progress:
+                progress(total)
+    return total
@@ -0,0 +1,13 @@
+from django.core.cache import cache
+
+HOME_PAGE_KEY = 'news:page:home'
+DETAIL_PAGE_KEY = 'news:page:detail:{news_id}'
+
+
+def detail_page_key(news_id):
+    return DETAIL_PAGE_KEY.format(news_id=news_id)
+
+
+def invalidate_news_pages(news_id):
+    """Сбрасывает кэш страницы новости и главной страницы."""
+    cache.delete_many((HOME_PAGE_KEY, detail_page_key(news_id)))
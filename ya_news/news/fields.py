@@ -0,0 +1,73 @@
+import lzma
+import zlib
+
+from django.db import models
+
+# Первый байт сжатого значения — алгоритм сжатия.
+ALGORITHMS = {
+    'zlib': (b'z', zlib.compress, zlib.decompress),
+    'lzma': (b'x', lzma.compress, lzma.decompress),
+}
+DECOMPRESSORS = {
+    marker: decompress for marker, _, decompress in ALGORITHMS.values()
+}
+
+
+class CompressedTextField(models.TextField):
+    """
+    Текст, который сжимается в базе, если он длиннее порога.
+
+    Короткие значения хранятся строкой, как в обычном TextField,
+    а длинные — байтами: маркер алгоритма и сжатые данные.
+    SQLite хранит байты в TEXT-колонке без преобразований,
+    поэтому старые несжатые строки читаются как раньше.
+    В Python значение всегда строка.
+
+    По сжатому тексту нельзя искать средствами базы (icontains
+    и т. п.); по тексту новостей база не ищет.
+    """
+
+    def __init__(self, *args, threshold=2048, algorithm='zlib', **kwargs):
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f'Неизвестный алгоритм сжатия: {algorithm}')
+        self.threshold = threshold
+        self.algorithm = algorithm
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        kwargs['threshold'] = self.threshold
+        kwargs['algorithm'] = self.algorithm
+        return name, path, args, kwargs
+
+    def compress(self, value):
+        """Байты для базы или сама строка, если она короче порога."""
+        data = value.encode()
+        if len(data) < self.threshold:
+            return value
+        marker, compress, _ = ALGORITHMS[self.algorithm]
+        return marker + compress(data)
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        value = super().get_db_prep_value(value, connection, prepared)
+        if value is None:
+            return value
+        return self.compress(value)
+
+    def from_db_value(self, value, expression, connection):
+        """
+        Распаковывает байты из базы.
+
+        Байты с неизвестным маркером или повреждённые данные
+        не роняют чтение: они возвращаются как есть в виде строки.
+        """
+        if isinstance(value, (bytes, memoryview)):
+            value = bytes(value)
+            decompress = DECOMPRESSORS.get(value[:1])
+            if decompress is not None:
+                try:
+                    return decompress(value[1:]).decode()
+                except (zlib.error, lzma.LZMAError, UnicodeDecodeError):
+                    pass
+            return value.decode(errors='replace')
+        return value
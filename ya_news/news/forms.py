@@ -2,6 +2,7 @@ from django.forms import ModelForm
 from django.core.exceptions import ValidationError
 
 from .models import Comment
+from .moderation import BannedWords
 
 BAD_WORDS = (
     'редиска',
@@ -9,6 +10,7 @@ BAD_WORDS = (
     # Дополните список на своё усмотрение.
 )
 WARNING = 'Не ругайтесь!'
+banned_words = BannedWords(BAD_WORDS)
 
 
 class CommentForm(ModelForm):
@@ -20,8 +22,6 @@ class CommentForm(ModelForm):
     def clean_text(self):
         """Не позволяем ругаться в комментариях."""
         text = self.cleaned_data['text']
-        lowered_text = text.lower()
-        for word in BAD_WORDS:
-            if word in lowered_text:
-                raise ValidationError(WARNING)
+        if banned_words.search(text):
+            raise ValidationError(WARNING)
         return text
@@ -0,0 +1,43 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from news.archive import CHUNK_SIZE, archive_comments
+
+
+class Command(BaseCommand):
+    help = (
+        'Переносит старые комментарии из рабочей таблицы в архив '
+        'пачками в коротких транзакциях.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than',
+            type=int,
+            required=True,
+            metavar='DAYS',
+            help='Переносить комментарии старше этого числа дней.',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=CHUNK_SIZE,
+            help='Сколько комментариев переносить за одну транзакцию.',
+        )
+
+    def handle(self, *args, **options):
+        archived = archive_comments(
+            timedelta(days=options['older_than']),
+            options['chunk_size'],
+            progress=lambda count: self.stdout.write(
+                f'Перенесено в архив: {count}'
+            ),
+            conflict=lambda using, pk: self.stderr.write(
+                f'Комментарий {pk} из базы {using} не перенесён: '
+                'в архиве под этим id другой комментарий.'
+            ),
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Архивация завершена: {archived} комментариев.'
+        ))
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from news.models import News
+from news.purge import CHUNK_SIZE, purge_news
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет новости вместе с комментариями пачками '
+        'в коротких транзакциях.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('ids', nargs='+', type=int, help='Id новостей.')
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=CHUNK_SIZE,
+            help='Сколько комментариев удалять за одну транзакцию.',
+        )
+
+    def handle(self, *args, **options):
+        found = News.objects.using('default').in_bulk(options['ids'])
+        missing = set(options['ids']) - set(found)
+        if missing:
+            raise CommandError(
+                'Новости не найдены: '
+                + ', '.join(str(pk) for pk in sorted(missing))
+            )
+        for news in found.values():
+            deleted = purge_news(
+                news,
+                options['chunk_size'],
+                progress=lambda count: self.stdout.write(
+                    f'Удалено комментариев: {count}'
+                ),
+            )
+            self.stdout.write(self.style.SUCCESS(
+                f'Новость «{news.title}» удалена, '
+                f'комментариев: {deleted}.'
+            ))
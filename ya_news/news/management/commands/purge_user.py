@@ -0,0 +1,40 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from news.purge import CHUNK_SIZE, purge_user
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет пользователя вместе с комментариями пачками '
+        'в коротких транзакциях.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('username', help='Имя пользователя.')
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=CHUNK_SIZE,
+            help='Сколько комментариев удалять за одну транзакцию.',
+        )
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(
+                f'Пользователь {options["username"]} не найден.'
+            )
+        deleted = purge_user(
+            user,
+            options['chunk_size'],
+            progress=lambda count: self.stdout.write(
+                f'Удалено комментариев: {count}'
+            ),
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Пользователь {options["username"]} удалён, '
+            f'комментариев: {deleted}.'
+        ))
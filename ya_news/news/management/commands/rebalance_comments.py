@@ -0,0 +1,115 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from news.models import Comment, CommentRow
+from news.sharding import comment_shards, shard_for_news
+
+BATCH_SIZE = 500
+
+
+class Command(BaseCommand):
+    help = (
+        'Переносит комментарии в шарды, которые им положены '
+        'по текущим COMMENT_SHARDS и COMMENT_SHARDING.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help='Сколько комментариев переносить за одну транзакцию.',
+        )
+        parser.add_argument(
+            '--from',
+            dest='sources',
+            nargs='+',
+            default=None,
+            help=(
+                'Базы, из которых забирать комментарии, например старый '
+                'шард, уже убранный из COMMENT_SHARDS. По умолчанию — '
+                'все шарды.'
+            ),
+        )
+
+    def misplaced(self, source, after_pk, batch_size):
+        """Следующая пачка комментариев источника не из своего шарда."""
+        batch = []
+        comments = Comment.objects.using(source).order_by('pk')
+        while len(batch) < batch_size:
+            chunk = list(comments.filter(pk__gt=after_pk)[:batch_size])
+            if not chunk:
+                break
+            after_pk = chunk[-1].pk
+            batch += [
+                comment for comment in chunk
+                if shard_for_news(comment.news_id) != source
+            ]
+        return batch, after_pk
+
+    def copy(self, target, comments):
+        """
+        Вставляет комментарии в шард target с новыми id.
+
+        Старые id взяты из диапазона другого шарда: AUTOINCREMENT
+        в SQLite продолжил бы с них, и шарды начали бы выдавать
+        одинаковые id. Комментарий, уже скопированный прерванным
+        переносом, узнаётся по (news_id, author_id, created).
+        Вставка идёт как при loaddata (raw), поэтому auto_now_add
+        не перезаписывает created, а через CommentRow сигналы
+        не меняют счётчики новостей.
+        """
+        copied = set(Comment.objects.using(target).filter(
+            news_id__in={comment.news_id for comment in comments},
+            created__in=[comment.created for comment in comments],
+        ).values_list('news_id', 'author_id', 'created'))
+        for comment in comments:
+            key = (comment.news_id, comment.author_id, comment.created)
+            if key in copied:
+                continue
+            CommentRow(
+                news_id=comment.news_id,
+                author_id=comment.author_id,
+                text=comment.text,
+                created=comment.created,
+            ).save_base(raw=True, force_insert=True, using=target)
+
+    def move(self, source, comments):
+        """
+        Копирует пачку в целевые шарды и удаляет её из источника.
+
+        Копирование пропускает уже перенесённые комментарии, поэтому
+        прерванный перенос можно просто повторить. Id перенесённых
+        комментариев меняются. Удаление идёт через CommentRow
+        без сигналов: счётчики новостей не меняются.
+        """
+        by_shard = {}
+        for comment in comments:
+            by_shard.setdefault(
+                shard_for_news(comment.news_id), []
+            ).append(comment)
+        for target, moved in by_shard.items():
+            with transaction.atomic(using=target):
+                self.copy(target, moved)
+        with transaction.atomic(using=source):
+            CommentRow.objects.using(source).filter(
+                pk__in=[comment.pk for comment in comments]
+            ).delete()
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        moved = 0
+        for source in options['sources'] or comment_shards():
+            after_pk = 0
+            while True:
+                comments, after_pk = self.misplaced(
+                    source, after_pk, batch_size
+                )
+                if not comments:
+                    break
+                self.move(source, comments)
+                moved += len(comments)
+                self.stdout.write(f'Перенесено комментариев: {moved}')
+        self.stdout.write(
+            self.style.SUCCESS(f'Перенос завершён: {moved} комментариев.')
+        )
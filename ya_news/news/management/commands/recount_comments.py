@@ -0,0 +1,87 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Case, Count, OuterRef, Subquery, Value, When
+from django.db.models.functions import Coalesce
+
+from news.models import ArchivedComment, Comment, News
+from news.sharding import fan_out, is_sharded
+
+BATCH_SIZE = 500
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает счётчики комментариев у новостей пачками, '
+        'включая архивные.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help='Сколько новостей обновлять за одну транзакцию.',
+        )
+
+    def get_count(self, pks):
+        """
+        Выражение для comment_count пачки новостей.
+
+        Без шардов счётчик считается подзапросом в той же базе,
+        с шардами — суммой по шардам, которая подставляется через CASE.
+        """
+        if not is_sharded():
+            return Coalesce(Subquery(
+                Comment.objects.filter(
+                    news=OuterRef('pk')
+                ).order_by().values('news').annotate(
+                    count=Count('pk')
+                ).values('count')
+            ), 0)
+        totals = dict.fromkeys(pks, 0)
+        for comments in fan_out(Comment.objects.filter(news_id__in=pks)):
+            for news_id, count in comments.order_by().values(
+                'news_id'
+            ).annotate(count=Count('pk')).values_list('news_id', 'count'):
+                totals[news_id] += count
+        return Case(
+            *(When(pk=pk, then=Value(count))
+              for pk, count in totals.items() if count),
+            default=Value(0),
+        )
+
+    def get_archived_count(self):
+        """Выражение для archived_count: архив лежит в основной базе."""
+        return Coalesce(Subquery(
+            ArchivedComment.objects.filter(
+                news=OuterRef('pk')
+            ).order_by().values('news').annotate(
+                count=Count('pk')
+            ).values('count')
+        ), 0)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        last_pk = 0
+        updated = 0
+        while True:
+            pks = list(
+                News.objects.filter(pk__gt=last_pk).order_by(
+                    'pk'
+                ).values_list('pk', flat=True)[:batch_size]
+            )
+            if not pks:
+                break
+            with transaction.atomic():
+                News.objects.filter(pk__in=pks).update(
+                    comment_count=(
+                        self.get_count(pks) + self.get_archived_count()
+                    ),
+                    archived_count=self.get_archived_count(),
+                )
+            last_pk = pks[-1]
+            updated += len(pks)
+            self.stdout.write(f'Обработано новостей: {updated}')
+        self.stdout.write(
+            self.style.SUCCESS(f'Счётчики пересчитаны у {updated} новостей.')
+        )
@@ -0,0 +1,37 @@
+from django.conf import settings
+
+from .routers import finish_request, start_request
+
+PRIMARY_COOKIE = 'news_primary'
+
+
+class ReplicaStickinessMiddleware:
+    """
+    Привязывает клиента к основной базе после записи.
+
+    Если запрос что-то записал, клиент получает cookie
+    на NEWS_REPLICA_STICKY_SECONDS, и пока она жива, его чтения
+    идут в основную базу: он сразу видит свой комментарий,
+    даже если реплика отстаёт.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.NEWS_REPLICA_DATABASE:
+            return self.get_response(request)
+        token = start_request(PRIMARY_COOKIE in request.COOKIES)
+        try:
+            response = self.get_response(request)
+        finally:
+            written = finish_request(token)
+        if written:
+            response.set_cookie(
+                PRIMARY_COOKIE,
+                '1',
+                max_age=settings.NEWS_REPLICA_STICKY_SECONDS,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
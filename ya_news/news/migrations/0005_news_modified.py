@@ -0,0 +1,18 @@
+# Generated by Django 3.2.15 on 2026-10-18 06:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0004_access_path_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='news',
+            name='modified',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='Изменена'),
+        ),
+    ]
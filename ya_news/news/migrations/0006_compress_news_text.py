@@ -0,0 +1,19 @@
+# Generated by Django 3.2.15 on 2026-10-18 06:31
+
+from django.db import migrations
+import news.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0005_news_modified'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='news',
+            name='text',
+            field=news.fields.CompressedTextField(algorithm='zlib', threshold=2048),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 3.2.15 on 2026-10-18 06:47
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('news', '0007_comment_without_db_constraints'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='news',
+            name='archived_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='В архиве'),
+        ),
+        migrations.CreateModel(
+            name='ArchivedComment',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('text', models.TextField()),
+                ('created', models.DateTimeField()),
+                ('author', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='archived_comments', to=settings.AUTH_USER_MODEL)),
+                ('news', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='archived_comments', to='news.news')),
+            ],
+            options={
+                'verbose_name': 'Архивный комментарий',
+                'verbose_name_plural': 'Архивные комментарии',
+                'ordering': ('created', 'id'),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='archivedcomment',
+            index=models.Index(fields=['news', 'created'], name='archived_news_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedcomment',
+            index=models.Index(fields=['author', 'created'], name='archived_author_created_idx'),
+        ),
+    ]
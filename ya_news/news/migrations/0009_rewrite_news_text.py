@@ -0,0 +1,56 @@
+from django.db import migrations, models, transaction
+from django.db.models import Value
+
+BATCH_SIZE = 500
+
+
+def rewrite_text(apps, using, compress):
+    """
+    Перезаписывает текст новостей пачками по диапазону id.
+
+    Каждая пачка — отдельная транзакция: миграция не атомарна,
+    чтобы не держать одну транзакцию на всю таблицу. При чтении
+    поле само распаковывает текст, при записи сжимает длинный;
+    для отката текст пишется как обычная строка.
+    """
+    News = apps.get_model('news', 'News')
+    queryset = News.objects.using(using)
+    field = News._meta.get_field('text')
+    last_pk = 0
+    while True:
+        with transaction.atomic(using=using):
+            rows = list(
+                queryset.filter(pk__gt=last_pk).order_by('pk').values_list(
+                    'pk', 'text'
+                )[:BATCH_SIZE]
+            )
+            if not rows:
+                break
+            for pk, text in rows:
+                if len(text.encode()) >= field.threshold:
+                    value = text if compress else Value(
+                        text, output_field=models.TextField()
+                    )
+                    queryset.filter(pk=pk).update(text=value)
+        last_pk = rows[-1][0]
+
+
+def compress_text(apps, schema_editor):
+    rewrite_text(apps, schema_editor.connection.alias, compress=True)
+
+
+def decompress_text(apps, schema_editor):
+    rewrite_text(apps, schema_editor.connection.alias, compress=False)
+
+
+class Migration(migrations.Migration):
+    # Схема поля изменена в 0006_compress_news_text, здесь только данные.
+    atomic = False
+
+    dependencies = [
+        ('news', '0008_archived_comment'),
+    ]
+
+    operations = [
+        migrations.RunPython(compress_text, decompress_text),
+    ]
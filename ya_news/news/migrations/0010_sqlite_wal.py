@@ -0,0 +1,34 @@
+from django.db import migrations
+
+
+def set_journal_mode(mode):
+    def run(apps, schema_editor):
+        connection = schema_editor.connection
+        if connection.vendor != 'sqlite':
+            return
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA journal_mode = {mode}')
+    return run
+
+
+class Migration(migrations.Migration):
+    """
+    Переводит файл базы SQLite в режим WAL.
+
+    Режим сохраняется в файле, поэтому PRAGMA выполняется один раз.
+    Внутри транзакции режим не меняется, поэтому миграция не атомарна.
+    """
+    atomic = False
+
+    dependencies = [
+        ('news', '0009_rewrite_news_text'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            set_journal_mode('wal'),
+            set_journal_mode('delete'),
+            # WAL нужен и шардам комментариев.
+            hints={'model_name': 'comment'},
+        ),
+    ]
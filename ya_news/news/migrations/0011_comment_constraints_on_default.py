@@ -0,0 +1,61 @@
+# Generated by Django 3.2.15 on 2026-10-18 07:04
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, migrations, models
+import django.db.models.deletion
+
+
+class AlterFieldOnDefault(migrations.AlterField):
+    """
+    Меняет поле в схеме только основной базы.
+
+    В шардах комментариев нет таблиц новостей и пользователей,
+    поэтому ограничения внешнего ключа, снятые в 0007, там не
+    возвращаются.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state,
+                          to_state):
+        if schema_editor.connection.alias == DEFAULT_DB_ALIAS:
+            super().database_forwards(
+                app_label, schema_editor, from_state, to_state
+            )
+
+    def database_backwards(self, app_label, schema_editor, from_state,
+                           to_state):
+        if schema_editor.connection.alias == DEFAULT_DB_ALIAS:
+            super().database_backwards(
+                app_label, schema_editor, from_state, to_state
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('news', '0010_sqlite_wal'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CommentRow',
+            fields=[
+            ],
+            options={
+                'proxy': True,
+                'indexes': [],
+                'constraints': [],
+            },
+            bases=('news.comment',),
+        ),
+        AlterFieldOnDefault(
+            model_name='comment',
+            name='author',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        AlterFieldOnDefault(
+            model_name='comment',
+            name='news',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='news.news'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 3.2.15 on 2026-10-18 07:05
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0011_comment_constraints_on_default'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedCommentRow',
+            fields=[
+            ],
+            options={
+                'proxy': True,
+                'indexes': [],
+                'constraints': [],
+            },
+            bases=('news.archivedcomment',),
+        ),
+    ]
@@ -3,35 +3,153 @@ from datetime import datetime
 from django.conf import settings
 from django.db import models
 
+from .fields import CompressedTextField
+
 
 class News(models.Model):
     title = models.CharField(max_length=50)
-    text = models.TextField()
+    text = CompressedTextField()
     date = models.DateField(default=datetime.today)
+    comment_count = models.PositiveIntegerField(
+        'Комментариев',
+        default=0,
+        editable=False,
+    )
+    archived_count = models.PositiveIntegerField(
+        'В архиве',
+        default=0,
+        editable=False,
+    )
+    modified = models.DateTimeField(
+        'Изменена',
+        auto_now=True,
+        db_index=True,
+    )
 
     class Meta:
         ordering = ('-date',)
+        indexes = (
+            models.Index(fields=('date',), name='news_date_idx'),
+        )
         verbose_name_plural = 'Новости'
         verbose_name = 'Новость'
 
+    COUNTERS = ('comment_count', 'archived_count')
+
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        """
+        Счётчики комментариев меняют только сигналы и команды,
+        поэтому при обновлении новости их не перезаписываем.
+        """
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.COUNTERS
+            ]
+        super().save(*args, **kwargs)
+
 
 class Comment(models.Model):
+    # Отдельные индексы по внешним ключам не нужны:
+    # их заменяют составные индексы из Meta.indexes.
+    # В основной базе ограничения внешнего ключа есть. В шардах нет
+    # таблиц новостей и пользователей, поэтому там ограничений нет
+    # (миграции 0007 и 0011), а целостность держат сигналы
+    # pre_delete новости и пользователя.
     news = models.ForeignKey(
         News,
-        on_delete=models.CASCADE
+        on_delete=models.CASCADE,
+        db_index=False,
     )
     author = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
+        db_index=False,
     )
     text = models.TextField()
     created = models.DateTimeField(auto_now_add=True)
 
+    is_archived = False
+
+    class Meta:
+        ordering = ('created', 'id')
+        indexes = (
+            models.Index(
+                fields=('news', 'created'), name='comment_news_created_idx'
+            ),
+            models.Index(
+                fields=('author', 'created'), name='comment_author_created_idx'
+            ),
+        )
+
+    def __str__(self):
+        return self.text[:50]
+
+
+class CommentRow(Comment):
+    """
+    Комментарий для массовых операций без сигналов.
+
+    Сигналы подключены к Comment, поэтому delete() через прокси
+    удаляет строки одним запросом, не загружая комментарии.
+    Счётчики и кэш новостей в этом случае обновляет вызывающий код.
+    """
+
+    class Meta:
+        proxy = True
+
+
+class ArchivedComment(models.Model):
+    """
+    Старый комментарий, перенесённый командой archive_comments.
+
+    Архив лежит только в основной базе и не шардируется.
+    Id сохраняется от исходного комментария, поэтому порядок
+    (created, id) на странице новости не меняется.
+    Комментарий в архиве только читается.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    news = models.ForeignKey(
+        News,
+        on_delete=models.CASCADE,
+        related_name='archived_comments',
+        db_index=False,
+    )
+    author = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='archived_comments',
+        db_index=False,
+    )
+    text = models.TextField()
+    created = models.DateTimeField()
+
+    is_archived = True
+
     class Meta:
-        ordering = ('created',)
+        ordering = ('created', 'id')
+        indexes = (
+            models.Index(
+                fields=('news', 'created'), name='archived_news_created_idx'
+            ),
+            models.Index(
+                fields=('author', 'created'),
+                name='archived_author_created_idx',
+            ),
+        )
+        verbose_name_plural = 'Архивные комментарии'
+        verbose_name = 'Архивный комментарий'
 
     def __str__(self):
         return self.text[:50]
+
+
+class ArchivedCommentRow(ArchivedComment):
+    """Архивный комментарий для массовых операций без сигналов."""
+
+    class Meta:
+        proxy = True
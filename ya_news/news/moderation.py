@@ -0,0 +1,140 @@
+import os
+import re
+import threading
+
+from django.conf import settings
+
+NEVER_MATCHES = re.compile(r'(?!)')
+END = ''
+
+
+def _build_trie(words):
+    trie = {}
+    for word in words:
+        if not word:
+            continue
+        node = trie
+        for char in word:
+            if END in node:
+                break
+            node = node.setdefault(char, {})
+        else:
+            # Более длинные слова с тем же началом проверять не нужно:
+            # для запрета достаточно найти короткое.
+            node.clear()
+            node[END] = True
+    return trie
+
+
+def _trie_to_regex(node):
+    if END in node:
+        return ''
+    chars = []
+    branches = []
+    for char in sorted(node):
+        tail = _trie_to_regex(node[char])
+        if tail:
+            branches.append(re.escape(char) + tail)
+        else:
+            chars.append(re.escape(char))
+    if len(chars) == 1:
+        branches.append(chars[0])
+    elif chars:
+        branches.append('[' + ''.join(chars) + ']')
+    if len(branches) == 1:
+        return branches[0]
+    return '(?:' + '|'.join(branches) + ')'
+
+
+def build_pattern(words):
+    """
+    Собирает все запрещённые слова в одно регулярное выражение.
+
+    Слова раскладываются в префиксное дерево, поэтому общие начала
+    слов проверяются один раз, а весь текст просматривается
+    одним вызовом search() вместо отдельного поиска каждого слова.
+    """
+    trie = _build_trie(words)
+    if not trie:
+        return NEVER_MATCHES
+    return re.compile(_trie_to_regex(trie))
+
+
+# Похожие латинские буквы и цифры заменяем кириллическими,
+# чтобы «рeдиcкa» с латиницей не проходила мимо словаря.
+HOMOGLYPHS = str.maketrans({
+    'ё': 'е',
+    'a': 'а',
+    'b': 'в',
+    'c': 'с',
+    'e': 'е',
+    'h': 'н',
+    'k': 'к',
+    'm': 'м',
+    'o': 'о',
+    'p': 'р',
+    't': 'т',
+    'x': 'х',
+    'y': 'у',
+    '0': 'о',
+    '3': 'з',
+})
+NOT_LOADED = object()
+
+
+def normalize(text):
+    """Приводит текст к виду, в котором хранится словарь."""
+    return text.casefold().translate(HOMOGLYPHS)
+
+
+class BannedWords:
+    """
+    Словарь запрещённых слов с версией.
+
+    Слова берутся из файла BAD_WORDS_FILE, а если он не задан
+    или отсутствует — из встроенного списка. Версия файла — время
+    изменения и размер; каждый процесс пересобирает шаблон только
+    тогда, когда версия поменялась.
+    """
+
+    def __init__(self, default_words):
+        self.default_words = tuple(default_words)
+        self.version = NOT_LOADED
+        self.pattern = NEVER_MATCHES
+        self._lock = threading.Lock()
+
+    def get_version(self):
+        path = settings.BAD_WORDS_FILE
+        if not path:
+            return None
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return str(path), stat.st_mtime_ns, stat.st_size
+
+    def load_words(self, version):
+        if version is None:
+            return self.default_words
+        path = version[0]
+        with open(path, encoding='utf-8') as file:
+            return [
+                line.strip() for line in file
+                if line.strip() and not line.startswith('#')
+            ]
+
+    def get_pattern(self):
+        version = self.get_version()
+        if version != self.version:
+            with self._lock:
+                if version != self.version:
+                    words = self.load_words(version)
+                    self.pattern = build_pattern(
+                        normalize(word) for word in words
+                    )
+                    self.version = version
+        return self.pattern
+
+    def search(self, text):
+        """Находит первое запрещённое слово в тексте."""
+        return self.get_pattern().search(normalize(text))
@@ -0,0 +1,110 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+from datetime import datetime
+
+from django.db.models import Exists, Q
+
+
+# Отметка курсора: следующая страница начинается ещё в архиве.
+ARCHIVE_MARK = 'archive'
+
+
+def encode_cursor(comment, archived=False):
+    """Курсор указывает на последний показанный комментарий."""
+    raw = f'{comment.created.isoformat()}|{comment.pk}'
+    if archived:
+        raw = f'{raw}|{ARCHIVE_MARK}'
+    return urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Возвращает (created, pk, archived) или ValueError для битого."""
+    try:
+        created, pk, *mark = (
+            urlsafe_b64decode(cursor.encode()).decode().split('|')
+        )
+        if mark not in ([], [ARCHIVE_MARK]):
+            raise ValueError(mark)
+        return datetime.fromisoformat(created), int(pk), bool(mark)
+    except (BinasciiError, UnicodeDecodeError, ValueError) as error:
+        raise ValueError(f'Некорректный курсор: {cursor}') from error
+
+
+def after_cursor(queryset, cursor):
+    """Строки queryset после позиции курсора в порядке (created, id)."""
+    if not cursor:
+        return queryset
+    created, pk, _ = decode_cursor(cursor)
+    return queryset.filter(
+        Q(created__gt=created) | Q(created=created, pk__gt=pk)
+    )
+
+
+def paginate_after(queryset, cursor, per_page, archived=False):
+    """
+    Страница комментариев после курсора в порядке (created, id).
+
+    Вместо OFFSET фильтруем по ключу сортировки, поэтому стоимость
+    страницы не зависит от того, насколько далеко листает читатель.
+    Возвращает список комментариев и курсор следующей страницы,
+    archived отмечает в нём, что страница взята из архива.
+    """
+    page = list(
+        after_cursor(queryset, cursor).order_by('created', 'pk')[
+            :per_page + 1
+        ]
+    )
+    if len(page) > per_page:
+        page = page[:per_page]
+        return page, encode_cursor(page[-1], archived)
+    return page, None
+
+
+def paginate_archive(hot, archive, cursor, per_page):
+    """Страница из архива после курсора, дополненная рабочей таблицей."""
+    page, next_cursor = paginate_after(
+        archive, cursor, per_page, archived=True
+    )
+    if next_cursor:
+        return page, next_cursor
+    after = encode_cursor(page[-1]) if page else cursor
+    if len(page) == per_page:
+        # Архив закончился ровно на границе страницы.
+        return page, after if hot.exists() else None
+    rest, next_cursor = paginate_after(hot, after, per_page - len(page))
+    return page + rest, next_cursor
+
+
+def paginate_with_archive(hot, archive, cursor, per_page, has_archive):
+    """
+    Страница комментариев, начало которых может лежать в архиве.
+
+    Архивные комментарии старше любых оставшихся в рабочей таблице,
+    поэтому сначала листается архив, а за ним — рабочая таблица.
+    Архив листается, пока курсор отмечен как архивный (для первой
+    страницы — если has_archive).
+
+    Неотмеченный курсор мог быть выдан до переноса комментариев
+    в архив. Есть ли в архиве что-то после него, проверяет EXISTS
+    в том же запросе к рабочей таблице, и если есть, курсор
+    считается архивным. Шард и архив лежат в разных базах,
+    поэтому для шарда проверка — отдельный запрос.
+    """
+    in_archive = decode_cursor(cursor)[2] if cursor else has_archive
+    if in_archive:
+        return paginate_archive(hot, archive, cursor, per_page)
+    if not cursor:
+        return paginate_after(hot, cursor, per_page)
+    archived_after = after_cursor(archive, cursor)
+    if hot.db != archive.db:
+        if archived_after.exists():
+            return paginate_archive(hot, archive, cursor, per_page)
+        return paginate_after(hot, cursor, per_page)
+    page, next_cursor = paginate_after(
+        hot.annotate(archived_after=Exists(archived_after)),
+        cursor,
+        per_page,
+    )
+    if page[0].archived_after if page else archived_after.exists():
+        return paginate_archive(hot, archive, cursor, per_page)
+    return page, next_cursor
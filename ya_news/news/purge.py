@@ -0,0 +1,110 @@
+from collections import Counter
+
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Case, F, Value, When
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .cache import invalidate_news_pages
+from .models import ArchivedCommentRow, CommentRow, News
+from .sharding import comment_shards, shard_for_news
+
+CHUNK_SIZE = 500
+
+
+def delete_chunks(queryset, using, chunk_size, fields=('pk',)):
+    """
+    Удаляет строки queryset пачками по chunk_size.
+
+    Каждая пачка — отдельная короткая транзакция: id выбираются
+    по индексу и удаляются одним DELETE. queryset берётся из прокси
+    без сигналов (CommentRow, ArchivedCommentRow), поэтому delete()
+    не загружает объекты. Генератор отдаёт значения fields удалённых
+    строк.
+    """
+    queryset = queryset.using(using).order_by()
+    while True:
+        with transaction.atomic(using=using):
+            rows = list(queryset.values_list(*fields)[:chunk_size])
+            if not rows:
+                return
+            queryset.filter(pk__in=[row[0] for row in rows]).delete()
+        yield rows
+
+
+def purge_news(news, chunk_size=CHUNK_SIZE, progress=None):
+    """
+    Удаляет новость, сначала её комментарии и их архив пачками.
+
+    Счётчик комментариев не трогаем: новость всё равно удаляется.
+    progress(deleted) вызывается после каждой пачки.
+    Возвращает число удалённых комментариев.
+    """
+    deleted = 0
+    for comments, using in (
+        (CommentRow.objects, shard_for_news(news.pk)),
+        (ArchivedCommentRow.objects, DEFAULT_DB_ALIAS),
+    ):
+        for rows in delete_chunks(
+            comments.filter(news_id=news.pk), using, chunk_size
+        ):
+            deleted += len(rows)
+            if progress:
+                progress(deleted)
+    news.delete()
+    return deleted
+
+
+def decrease_comment_counts(counts, archived=False):
+    """
+    Уменьшает счётчики новостей одним UPDATE: {news_id: сколько}.
+
+    Для архивных комментариев уменьшается и archived_count.
+    """
+    fields = ('comment_count', 'archived_count') if archived else (
+        'comment_count',
+    )
+    News.objects.filter(pk__in=counts).update(
+        **{
+            field: Greatest(
+                F(field) - Case(
+                    *(When(pk=news_id, then=Value(count))
+                      for news_id, count in counts.items()),
+                    default=Value(0),
+                ),
+                0,
+            )
+            for field in fields
+        },
+        modified=timezone.now(),
+    )
+    for news_id in counts:
+        invalidate_news_pages(news_id)
+
+
+def purge_user(user, chunk_size=CHUNK_SIZE, progress=None):
+    """
+    Удаляет пользователя, сначала его комментарии и их архив пачками.
+
+    После каждой пачки уменьшаются счётчики затронутых новостей
+    и сбрасывается кэш их страниц. Возвращает число удалённых
+    комментариев.
+    """
+    deleted = 0
+    sources = [
+        (CommentRow.objects, using, False) for using in comment_shards()
+    ]
+    sources.append((ArchivedCommentRow.objects, DEFAULT_DB_ALIAS, True))
+    for comments, using, archived in sources:
+        for rows in delete_chunks(
+            comments.filter(author_id=user.pk), using, chunk_size,
+            fields=('pk', 'news_id'),
+        ):
+            decrease_comment_counts(
+                Counter(news_id for _, news_id in rows), archived
+            )
+            deleted += len(rows)
+            if progress:
+                progress(deleted)
+    user.delete()
+    return deleted
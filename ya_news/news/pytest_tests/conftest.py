@@ -1,8 +1,13 @@
 import datetime
 from datetime import datetime, timedelta
+from io import StringIO
 
 import pytest
 from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, connections
+from django.db.models import F
 from django.test.client import Client
 from django.utils import timezone
 from django.urls import reverse
@@ -10,6 +15,62 @@ from django.urls import reverse
 from news.models import Comment, News
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+
+
+@pytest.fixture
+def replica(transactional_db, settings, tmp_path):
+    """
+    Реплика в отдельном файле SQLite.
+
+    Фикстура возвращает функцию синхронизации: она копирует
+    основную базу в реплику через backup API SQLite. Между вызовами
+    реплика отстаёт, как настоящая. Backup не копирует базу
+    с открытой транзакцией, поэтому тесты с репликой транзакционные.
+    """
+    connections.databases['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': str(tmp_path / 'replica.sqlite3'),
+    }
+    settings.NEWS_REPLICA_DATABASE = 'replica'
+
+    def sync():
+        connection.ensure_connection()
+        connections['replica'].ensure_connection()
+        connection.connection.backup(connections['replica'].connection)
+
+    sync()
+    yield sync
+    connections['replica'].close()
+    del connections['replica']
+    del connections.databases['replica']
+
+
+@pytest.fixture
+def comment_shards(db, settings, tmp_path):
+    """
+    Два шарда комментариев в отдельных файлах SQLite.
+
+    Новости и пользователи остаются в основной базе.
+    """
+    aliases = ['shard_0', 'shard_1']
+    for alias in aliases:
+        connections.databases[alias] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': str(tmp_path / f'{alias}.sqlite3'),
+        }
+    settings.COMMENT_SHARDS = aliases
+    for alias in aliases:
+        call_command('migrate', database=alias, verbosity=0)
+    yield aliases
+    for alias in aliases:
+        connections[alias].close()
+        del connections[alias]
+        del connections.databases[alias]
+
+
 @pytest.fixture
 def author(django_user_model):
     return django_user_model.objects.create(username='Автор')
@@ -83,6 +144,16 @@ def comments(author, news):
         comment.save()
 
 
+@pytest.fixture
+def archived_comments(comments, news):
+    """Первые шесть комментариев состарены на 100 дней и ушли в архив."""
+    old = Comment.objects.order_by('created')[:6].values_list('pk')
+    Comment.objects.filter(pk__in=old).update(
+        created=F('created') - timedelta(days=100)
+    )
+    call_command('archive_comments', older_than=30, stdout=StringIO())
+
+
 @pytest.fixture
 def form_data():
     return {'text': 'Beautiful text'}
@@ -98,6 +169,11 @@ def url_news_detail(id_for_args):
     return reverse('news:detail', args=(id_for_args))
 
 
+@pytest.fixture
+def url_news_comments(id_for_args):
+    return reverse('news:comments', args=(id_for_args))
+
+
 @pytest.fixture
 def url_comment_delete(comment):
     return reverse('news:delete', args=(comment.id,))
@@ -1,7 +1,14 @@
+from datetime import timedelta
+from io import StringIO
+
 import pytest
 from django.conf import settings
+from django.core.management import call_command
+from django.db.models import F
+from django.urls import reverse
 
 from news.forms import CommentForm
+from news.models import ArchivedComment, Comment, News
 
 
 @pytest.mark.django_db
@@ -29,6 +36,22 @@ def test_news_order(all_news, client, url_home):
     assert all_dates == sorted_dates
 
 
+@pytest.mark.django_db
+def test_home_page_query_count(
+    comments, news, client, url_home, django_assert_num_queries
+):
+    """
+    Главной странице хватает запроса валидаторов и одного запроса
+    новостей, сколько бы комментариев у них ни было.
+    """
+    with django_assert_num_queries(2):
+        response = client.get(url_home)
+    object_list = response.context['object_list']
+    counts = {item.title: item.comment_count for item in object_list}
+    assert counts[news.title] == 10
+    assert 'Комментариев: 10' in response.content.decode()
+
+
 def test_comments_order(comments, news, client, url_news_detail):
     """
     Комментарии на странице отдельной новости отсортированы
@@ -42,6 +65,48 @@ def test_comments_order(comments, news, client, url_news_detail):
     assert all_timestamps == sorted_timestamps
 
 
+def test_comments_paginated_by_cursor(
+    comments, client, settings, url_news_detail, url_news_comments
+):
+    """
+    Комментарии выводятся страницами, следующая страница
+    запрашивается по курсору из предыдущей.
+    """
+    settings.COMMENTS_COUNT_ON_NEWS_PAGE = 4
+    response = client.get(url_news_detail)
+    shown = list(response.context['comments'])
+    cursor = response.context['next_cursor']
+    assert len(shown) == 4
+    while cursor:
+        response = client.get(url_news_comments, {'cursor': cursor})
+        shown += response.context['comments']
+        cursor = response.context['next_cursor']
+    assert len(shown) == 10
+    assert [comment.created for comment in shown] == sorted(
+        comment.created for comment in shown
+    )
+
+
+def test_comments_page_cost_is_constant(
+    comments, client, settings, url_news_comments, django_assert_num_queries
+):
+    """
+    Любая страница комментариев — запрос новости и один запрос
+    комментариев без OFFSET, как бы глубоко ни листал читатель.
+    """
+    settings.COMMENTS_COUNT_ON_NEWS_PAGE = 2
+    cursor = None
+    for _ in range(5):
+        with django_assert_num_queries(2) as captured:
+            response = client.get(
+                url_news_comments, {'cursor': cursor} if cursor else {}
+            )
+        for query in captured.captured_queries:
+            assert 'OFFSET' not in query['sql']
+        cursor = response.context['next_cursor']
+    assert cursor is None
+
+
 @pytest.mark.django_db
 def test_anonymous_client_has_no_form(client, news, url_news_detail):
     """
@@ -60,3 +125,128 @@ def test_authorized_client_has_form(author_client, news, url_news_detail):
     response = author_client.get(url_news_detail)
     assert 'form' in response.context
     assert isinstance(response.context['form'], CommentForm)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    'url',
+    (pytest.lazy_fixture('url_home'), pytest.lazy_fixture('url_news_detail'))
+)
+def test_anonymous_pages_are_cached(
+    comments, client, url, django_assert_num_queries
+):
+    """Повторный запрос анонимного читателя не обращается к базе."""
+    first_response = client.get(url)
+    with django_assert_num_queries(0):
+        second_response = client.get(url)
+    assert second_response.content == first_response.content
+
+
+def test_comment_invalidates_only_its_news(
+    author_client, client, news, form_data, url_home, url_news_detail,
+    django_assert_num_queries
+):
+    """Новый комментарий сбрасывает кэш своей новости и главной страницы."""
+    other_news = News.objects.create(title='Другая', text='Текст')
+    url_other_news = reverse('news:detail', args=(other_news.id,))
+    for url in (url_home, url_news_detail, url_other_news):
+        client.get(url)
+    author_client.post(url_news_detail, form_data)
+    assert form_data['text'] in client.get(url_news_detail).content.decode()
+    assert 'Комментариев: 1' in client.get(url_home).content.decode()
+    with django_assert_num_queries(0):
+        client.get(url_other_news)
+
+
+def test_authorized_client_bypasses_cache(
+    author, author_client, client, comment, url_news_detail
+):
+    """Авторизованный пользователь получает свою страницу, а не из кэша."""
+    client.get(url_news_detail)
+    content = author_client.get(url_news_detail).content.decode()
+    assert author.username in content
+    assert 'Редактировать' in content
+
+
+@pytest.mark.parametrize('per_page', (3, 4, 6, 20))
+def test_archived_comments_paginated(
+    archived_comments, client, settings, per_page,
+    url_news_detail, url_news_comments
+):
+    """
+    Страницы новости сначала читают архив, затем рабочую таблицу,
+    порядок комментариев тот же, что и без архива.
+    """
+    settings.COMMENTS_COUNT_ON_NEWS_PAGE = per_page
+    response = client.get(url_news_detail)
+    shown = list(response.context['comments'])
+    cursor = response.context['next_cursor']
+    while cursor:
+        response = client.get(url_news_comments, {'cursor': cursor})
+        assert response.context['comments']
+        shown += response.context['comments']
+        cursor = response.context['next_cursor']
+    assert [comment.text for comment in shown] == [
+        f'Tекст {index}' for index in range(10)
+    ]
+    assert [comment.is_archived for comment in shown] == (
+        [True] * 6 + [False] * 4
+    )
+
+
+def test_archived_comments_are_read_only(
+    archived_comments, author_client, url_news_detail
+):
+    """Для архивных комментариев нет ссылок на правку и удаление."""
+    response = author_client.get(url_news_detail)
+    content = response.content.decode()
+    for comment in ArchivedComment.objects.all():
+        assert reverse('news:edit', args=(comment.pk,)) not in content
+    assert content.count('Редактировать') == 4
+
+
+def test_recent_comments_skip_archive(
+    archived_comments, client, settings, url_news_detail,
+    url_news_comments, django_assert_num_queries
+):
+    """Страницы после архива снова стоят один запрос комментариев."""
+    settings.COMMENTS_COUNT_ON_NEWS_PAGE = 7
+    cursor = client.get(url_news_detail).context['next_cursor']
+    with django_assert_num_queries(2):
+        response = client.get(url_news_comments, {'cursor': cursor})
+    assert len(response.context['comments']) == 3
+
+
+def test_comments_page_starts_with_archive(
+    archived_comments, client, settings, url_news_comments
+):
+    """Страница комментариев без курсора начинается с архива."""
+    settings.COMMENTS_COUNT_ON_NEWS_PAGE = 4
+    response = client.get(url_news_comments)
+    assert [comment.text for comment in response.context['comments']] == [
+        f'Tекст {index}' for index in range(4)
+    ]
+
+
+def test_cursor_issued_before_archive(
+    comments, client, settings, url_news_detail, url_news_comments
+):
+    """Курсор, выданный до переноса в архив, не пропускает архив."""
+    settings.COMMENTS_COUNT_ON_NEWS_PAGE = 4
+    old = Comment.objects.order_by('created')[:6].values_list('pk')
+    Comment.objects.filter(pk__in=old).update(
+        created=F('created') - timedelta(days=100)
+    )
+    cursor = client.get(url_news_detail).context['next_cursor']
+    call_command('archive_comments', older_than=30, stdout=StringIO())
+    shown = []
+    while cursor:
+        response = client.get(url_news_comments, {'cursor': cursor})
+        shown += response.context['comments']
+        cursor = response.context['next_cursor']
+    assert [comment.text for comment in shown] == [
+        f'Tекст {index}' for index in range(4, 10)
+    ]
+    assert [comment.is_archived for comment in shown] == (
+        [True] * 2 + [False] * 4
+    )
@@ -0,0 +1,405 @@
+import threading
+from contextlib import ExitStack
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, connections, transaction
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.db.utils import OperationalError
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from news.fields import CompressedTextField
+from news.models import Comment, News
+from news.sharding import SHARD_ID_SPAN
+
+
+def query_plans(client, url):
+    """Планы выполнения всех SQL-запросов, сделанных при загрузке страницы."""
+    # Страница из кэша не делает запросов: собираем её заново.
+    cache.clear()
+    with CaptureQueriesContext(connection) as captured:
+        client.get(url)
+    plans = []
+    with connection.cursor() as cursor:
+        for query in captured.captured_queries:
+            cursor.execute('EXPLAIN QUERY PLAN ' + query['sql'])
+            plans.append(
+                ' / '.join(row[-1] for row in cursor.fetchall())
+            )
+    return plans
+
+
+def find_plan(plans, table):
+    return [plan for plan in plans if f' {table} ' in f'{plan} ']
+
+
+@pytest.mark.django_db
+def test_home_page_uses_date_index(all_news, client, url_home):
+    """Главная страница читает новости по индексу даты без сортировки."""
+    plans = find_plan(query_plans(client, url_home), 'news_news')
+    assert plans
+    for plan in plans:
+        assert 'news_date_idx' in plan
+        assert 'TEMP B-TREE' not in plan
+
+
+def test_detail_page_uses_comment_index(
+    comments, client, settings, url_news_detail, url_news_comments
+):
+    """Страницы комментариев новости читаются по индексу (news, created)."""
+    settings.COMMENTS_COUNT_ON_NEWS_PAGE = 4
+    cursor = client.get(url_news_detail).context['next_cursor']
+    pages = (
+        query_plans(client, url_news_detail),
+        query_plans(client, f'{url_news_comments}?cursor={cursor}'),
+    )
+    for plans in pages:
+        (plan,) = find_plan(plans, 'news_comment')
+        assert 'comment_news_created_idx' in plan
+        assert 'TEMP B-TREE' not in plan
+
+
+def test_authorized_detail_page_uses_comment_index(
+    comments, author_client, settings, url_news_detail
+):
+    """Страница, собранная для автора в обход кэша, тоже читает индекс."""
+    settings.COMMENTS_COUNT_ON_NEWS_PAGE = 4
+    (plan,) = find_plan(
+        query_plans(author_client, url_news_detail), 'news_comment'
+    )
+    assert 'comment_news_created_idx' in plan
+    assert 'TEMP B-TREE' not in plan
+
+
+@pytest.mark.parametrize('name', ('news:edit', 'news:delete'))
+def test_edit_delete_lookup_uses_index(name, comment, author_client):
+    """Поиск комментария для редактирования и удаления не сканирует таблицу."""
+    plans = query_plans(author_client, reverse(name, args=(comment.id,)))
+    comment_plans = find_plan(plans, 'news_comment')
+    assert comment_plans
+    for plan in comment_plans:
+        assert plan.startswith('SEARCH')
+        assert 'TEMP B-TREE' not in plan
+
+
+def test_author_comments_use_author_index(author, comments):
+    """Комментарии автора читаются по индексу (author, created)."""
+    queryset = Comment.objects.filter(author=author)
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+        plan = ' / '.join(row[-1] for row in cursor.fetchall())
+    assert 'comment_author_created_idx' in plan
+    assert 'TEMP B-TREE' not in plan
+
+
+@pytest.mark.django_db
+def test_long_news_text_is_stored_compressed(client):
+    """Длинный текст новости сжат в базе и распаковывается при чтении."""
+    text = 'Очень длинная новость. ' * 500
+    news = News.objects.create(title='Длинная', text=text)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT typeof(text), length(text) FROM news_news WHERE id = %s',
+            (news.pk,)
+        )
+        kind, size = cursor.fetchone()
+    assert kind == 'blob'
+    assert size < len(text.encode()) / 10
+    response = client.get(reverse('news:detail', args=(news.pk,)))
+    assert response.context['news'].text == text
+
+
+@pytest.mark.parametrize('stored', (b'?raw text', b'zbroken'))
+def test_unknown_compressed_marker_is_returned_as_is(stored):
+    """Байты с неизвестным маркером читаются без ошибки."""
+    field = CompressedTextField()
+    assert field.from_db_value(stored, None, connection) == stored.decode()
+
+
+def open_database(path):
+    """Отдельное соединение с файловой базой, как у процесса сервера."""
+    database = DatabaseWrapper(
+        {**connection.settings_dict, 'NAME': str(path)}, alias='file'
+    )
+    database.ensure_connection()
+    return database
+
+
+@pytest.mark.django_db
+def test_file_connection_is_tuned(tmp_path):
+    """К новому соединению применяются PRAGMA из настроек."""
+    database = open_database(tmp_path / 'db.sqlite3')
+    with database.cursor() as cursor:
+        pragmas = {}
+        for name in ('journal_mode', 'synchronous', 'busy_timeout'):
+            cursor.execute(f'PRAGMA {name}')
+            pragmas[name] = cursor.fetchone()[0]
+    database.close()
+    # Режим WAL включает миграция, а не каждое соединение.
+    assert pragmas == {
+        'journal_mode': 'delete', 'synchronous': 1, 'busy_timeout': 5000
+    }
+
+
+def test_migrate_enables_wal(comment_shards):
+    """После migrate файл базы работает в режиме WAL."""
+    for alias in comment_shards:
+        with connections[alias].cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            assert cursor.fetchone()[0] == 'wal'
+
+
+def write_comments(alias, batches, batch_size, errors, writing):
+    try:
+        for _ in range(batches):
+            with transaction.atomic(using=alias):
+                Comment.objects.using(alias).bulk_create(
+                    Comment(news_id=1, author_id=1, text='Комментарий')
+                    for _ in range(batch_size)
+                )
+    except OperationalError as error:
+        errors.append(error)
+    finally:
+        writing.clear()
+        connections[alias].close()
+
+
+def read_comments(alias, errors, writing):
+    try:
+        # Читатель не ждёт писателя: любая блокировка сразу ошибка.
+        with connections[alias].cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout = 0')
+        while writing.is_set():
+            Comment.objects.using(alias).count()
+    except OperationalError as error:
+        errors.append(error)
+    finally:
+        connections[alias].close()
+
+
+def test_readers_are_not_locked_by_writer(comment_shards):
+    """
+    В базе после migrate, пока один поток пишет комментарии,
+    читающие потоки не получают блокировку.
+    """
+    alias = comment_shards[0]
+    batches, batch_size = 50, 100
+    errors = []
+    writing = threading.Event()
+    writing.set()
+    threads = [
+        threading.Thread(target=read_comments, args=(alias, errors, writing))
+        for _ in range(4)
+    ]
+    threads.append(threading.Thread(
+        target=write_comments,
+        args=(alias, batches, batch_size, errors, writing),
+    ))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert Comment.objects.using(alias).count() == batches * batch_size
+
+
+def shard_comments(alias):
+    """Тексты комментариев, лежащих в шарде, по порядку id."""
+    return list(
+        Comment.objects.using(alias).order_by('pk').values_list(
+            'text', flat=True
+        )
+    )
+
+
+@pytest.fixture
+def two_news(author):
+    """Новости с соседними id попадают в разные шарды."""
+    return sorted(
+        (News.objects.create(title=f'Новость {index}', text='Текст')
+         for index in range(2)),
+        key=lambda news: news.pk % 2,
+    )
+
+
+def post_comment(client, news, text):
+    client.post(reverse('news:detail', args=(news.pk,)), data={'text': text})
+
+
+def test_comments_are_stored_in_news_shard(
+    two_news, author_client, comment_shards
+):
+    """Комментарий пишется в шард своей новости, id не пересекаются."""
+    for news in two_news:
+        post_comment(author_client, news, f'К новости {news.pk}')
+    for news, alias in zip(two_news, comment_shards):
+        assert shard_comments(alias) == [f'К новости {news.pk}']
+        news.refresh_from_db()
+        assert news.comment_count == 1
+    second = Comment.objects.using('shard_1').get()
+    assert second.pk > SHARD_ID_SPAN
+
+
+def test_news_detail_reads_one_shard(
+    two_news, author_client, client, comment_shards
+):
+    """Страница новости читает комментарии ровно из одного шарда."""
+    for news in two_news:
+        post_comment(author_client, news, f'К новости {news.pk}')
+    news = two_news[1]
+    with ExitStack() as stack:
+        captured = {
+            alias: stack.enter_context(
+                CaptureQueriesContext(connections[alias])
+            )
+            for alias in comment_shards
+        }
+        response = client.get(reverse('news:detail', args=(news.pk,)))
+    assert len(captured['shard_0']) == 0
+    assert len(captured['shard_1']) == 1
+    (comment,) = response.context['comments']
+    assert comment.text == f'К новости {news.pk}'
+    assert comment.author.username == 'Автор'
+
+
+def test_author_comments_fan_out(
+    two_news, author_client, not_author_client, comment_shards
+):
+    """Редактировать можно свой комментарий из любого шарда."""
+    for text, news in zip(('Первый', 'Второй', 'Третий'), two_news * 2):
+        post_comment(author_client, news, text)
+    comment = Comment.objects.using('shard_1').get()
+    url = reverse('news:edit', args=(comment.pk,))
+    response = not_author_client.post(url, data={'text': 'Чужой'})
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    author_client.post(url, data={'text': 'Исправленный'})
+    assert shard_comments('shard_1') == ['Исправленный']
+    author_client.post(reverse('news:delete', args=(comment.pk,)))
+    assert shard_comments('shard_1') == []
+    assert shard_comments('shard_0') == ['Первый', 'Третий']
+
+
+def test_admin_shows_comments_from_shard(
+    two_news, author_client, admin_client, comment_shards
+):
+    """Админка показывает и правит комментарии из шарда новости."""
+    news = two_news[1]
+    post_comment(author_client, news, 'Из шарда')
+    comment = Comment.objects.using('shard_1').get()
+    url = reverse('admin:news_news_change', args=(news.pk,))
+    response = admin_client.get(url)
+    formset = response.context['inline_admin_formsets'][0].formset
+    assert [form.instance for form in formset] == [comment]
+    data = {
+        'title': news.title, 'text': news.text,
+        'date': news.date.strftime('%d.%m.%Y'),
+        'comment_set-TOTAL_FORMS': 1, 'comment_set-INITIAL_FORMS': 1,
+        'comment_set-MIN_NUM_FORMS': 0, 'comment_set-MAX_NUM_FORMS': 1000,
+        'comment_set-0-id': comment.pk, 'comment_set-0-news': news.pk,
+        'comment_set-0-author': comment.author_id,
+        'comment_set-0-text': 'Исправлен в админке',
+    }
+    admin_client.post(url, data)
+    assert shard_comments('shard_1') == ['Исправлен в админке']
+
+
+def test_deletes_cascade_into_shards(
+    two_news, author, author_client, comment_shards
+):
+    for news in two_news:
+        post_comment(author_client, news, 'Комментарий')
+    two_news[0].delete()
+    assert shard_comments('shard_0') == []
+    author.delete()
+    assert shard_comments('shard_1') == []
+    two_news[1].refresh_from_db()
+    assert two_news[1].comment_count == 0
+
+
+def test_range_sharding(two_news, author_client, settings, comment_shards):
+    settings.COMMENT_SHARDING = 'range'
+    first, second = sorted(two_news, key=lambda news: news.pk)
+    settings.COMMENT_SHARD_RANGES = [second.pk]
+    for news in (first, second):
+        post_comment(author_client, news, f'К новости {news.pk}')
+    assert shard_comments('shard_0') == [f'К новости {first.pk}']
+    assert shard_comments('shard_1') == [f'К новости {second.pk}']
+
+
+def test_rebalance_and_recount(
+    two_news, author_client, settings, comment_shards
+):
+    """
+    После добавления шарда rebalance_comments переносит комментарии,
+    счётчики и страницы новостей не меняются.
+    """
+    settings.COMMENT_SHARDS = ['shard_0']
+    for news in two_news:
+        for index in range(3):
+            post_comment(author_client, news, f'{news.pk}-{index}')
+    assert len(shard_comments('shard_0')) == 6
+    settings.COMMENT_SHARDS = comment_shards
+    call_command('rebalance_comments', batch_size=2, stdout=StringIO())
+    for news, alias in zip(two_news, comment_shards):
+        assert shard_comments(alias) == [
+            f'{news.pk}-{index}' for index in range(3)
+        ]
+    News.objects.update(comment_count=0)
+    call_command('recount_comments', stdout=StringIO())
+    for news in two_news:
+        news.refresh_from_db()
+        assert news.comment_count == 3
+        response = author_client.get(reverse('news:detail', args=(news.pk,)))
+        assert len(response.context['comments']) == 3
+
+
+def test_rebalance_keeps_shard_ids_apart(
+    two_news, author_client, settings, comment_shards
+):
+    """
+    После переноса в шард с меньшими id шарды по-прежнему выдают
+    разные id, а время комментариев не меняется.
+    """
+    settings.COMMENT_SHARDING = 'range'
+    first, second = sorted(two_news, key=lambda news: news.pk)
+    settings.COMMENT_SHARD_RANGES = [first.pk]
+    for news in (first, second):
+        post_comment(author_client, news, f'До {news.pk}')
+    created = Comment.objects.using('shard_1').get(news=first).created
+    settings.COMMENT_SHARD_RANGES = [second.pk]
+    call_command('rebalance_comments', stdout=StringIO())
+    moved = Comment.objects.using('shard_0').get()
+    assert moved.created == created
+    for news in (first, second):
+        post_comment(author_client, news, f'После {news.pk}')
+    for index, alias in enumerate(comment_shards):
+        ids = Comment.objects.using(alias).values_list('pk', flat=True)
+        assert all(
+            index * SHARD_ID_SPAN <= pk < (index + 1) * SHARD_ID_SPAN
+            for pk in ids
+        )
+    assert shard_comments('shard_0') == [f'До {first.pk}', f'После {first.pk}']
+    assert shard_comments('shard_1') == [
+        f'До {second.pk}', f'После {second.pk}'
+    ]
+
+
+def foreign_keys(alias):
+    with connections[alias].cursor() as cursor:
+        cursor.execute('PRAGMA foreign_key_list(news_comment)')
+        return {row[2] for row in cursor.fetchall()}
+
+
+def test_comment_constraints_only_on_default(comment_shards):
+    """
+    В основной базе у комментариев есть внешние ключи, а в шардах,
+    где нет новостей и пользователей, — нет.
+    """
+    assert foreign_keys('default') == {'news_news', 'auth_user'}
+    for alias in comment_shards:
+        assert foreign_keys(alias) == set()
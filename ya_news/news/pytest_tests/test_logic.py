@@ -1,10 +1,17 @@
+from datetime import timedelta
 from http import HTTPStatus
+from io import StringIO
 
 import pytest
+from django.core.management import call_command
+from django.db import connections
+from django.db.models import F
+from django.urls import reverse
 from pytest_django.asserts import assertRedirects, assertFormError
 
 from news.forms import BAD_WORDS, WARNING
-from news.models import Comment
+from news.models import ArchivedComment, Comment, News
+from news.moderation import build_pattern
 
 
 @pytest.mark.django_db
@@ -45,6 +52,49 @@ def test_user_cant_use_bad_words(
     assert Comment.objects.count() == 0
 
 
+def test_bad_words_pattern_finds_every_word():
+    """Шаблон находит любое запрещённое слово, чистый текст пропускает."""
+    words = ['редиска', 'редис', 'негодяй', 'негодник', 'a.b', 'ab']
+    pattern = build_pattern(words)
+    for word in words:
+        assert pattern.search(f'текст {word} текст')
+    assert not pattern.search('чистый текст без ругательств, a-b')
+    assert not build_pattern([]).search('редиска')
+
+
+@pytest.mark.parametrize(
+    'disguised_word',
+    ('РЕДИСКА', 'рeдиcкa', 'НЕГ0ДЯЙ')
+)
+@pytest.mark.django_db
+def test_user_cant_disguise_bad_words(
+    author_client, disguised_word, news, url_news_detail
+):
+    """Регистр и похожие латинские буквы не помогают обойти словарь."""
+    bad_words_data = {'text': f'Ты {disguised_word}!'}
+    response = author_client.post(url_news_detail, data=bad_words_data)
+    assertFormError(response, form='form', field='text', errors=WARNING)
+    assert Comment.objects.count() == 0
+
+
+@pytest.mark.django_db
+def test_bad_words_file_is_reloaded(
+    author_client, news, settings, tmp_path, url_news_detail
+):
+    """Изменения файла со словарём подхватываются без перезапуска."""
+    bad_words_file = tmp_path / 'bad_words.txt'
+    bad_words_file.write_text('# Словарь\nзлодей\n', encoding='utf-8')
+    settings.BAD_WORDS_FILE = bad_words_file
+    response = author_client.post(url_news_detail, {'text': 'Злодей!'})
+    assertFormError(response, form='form', field='text', errors=WARNING)
+    bad_words_file.write_text('хулиган\n', encoding='utf-8')
+    response = author_client.post(url_news_detail, {'text': 'Злодей!'})
+    assertRedirects(response, f'{url_news_detail}#comments')
+    response = author_client.post(url_news_detail, {'text': 'Хулиган!'})
+    assertFormError(response, form='form', field='text', errors=WARNING)
+    assert Comment.objects.count() == 1
+
+
 def test_author_can_delete_comment(
     author_client, url_news_detail, url_comment_delete
 ):
@@ -89,3 +139,305 @@ def test_user_cant_edit_comment_of_another_user(
     assert comment.text == original_text
     assert comment.news == original_news
     assert comment.author == original_author
+
+
+@pytest.mark.django_db
+def test_comment_count_follows_comments(
+    author_client, news, form_data, url_news_detail
+):
+    """Счётчик комментариев новости меняется при добавлении и удалении."""
+    author_client.post(url_news_detail, form_data)
+    news.refresh_from_db()
+    assert news.comment_count == 1
+    comment = Comment.objects.get()
+    news.title = 'Новый заголовок'
+    news.save()
+    news.refresh_from_db()
+    assert news.comment_count == 1
+    author_client.post(reverse('news:delete', args=(comment.id,)))
+    news.refresh_from_db()
+    assert news.comment_count == 0
+
+
+def test_comment_count_after_author_deleted(author, comments, news):
+    """Удаление автора уменьшает счётчики у новостей с его комментариями."""
+    news.refresh_from_db()
+    assert news.comment_count == 10
+    author.delete()
+    news.refresh_from_db()
+    assert news.comment_count == 0
+
+
+def test_recount_comments_command(comments, news):
+    """Команда recount_comments восстанавливает счётчики комментариев."""
+    News.objects.update(comment_count=0)
+    call_command('recount_comments', batch_size=1, stdout=StringIO())
+    news.refresh_from_db()
+    assert news.comment_count == 10
+
+
+# Сессия и пользователь — два запроса, остальное тратит сама операция.
+@pytest.mark.parametrize(
+    'url, data, expected_queries',
+    (
+        # Новость, вставка комментария, счётчик новости.
+        (pytest.lazy_fixture('url_news_detail'),
+         pytest.lazy_fixture('form_data'), 5),
+        # Комментарий, его обновление, время изменения новости.
+        (pytest.lazy_fixture('url_comment_edit'),
+         pytest.lazy_fixture('form_data'), 5),
+        # Комментарий, его удаление, счётчик новости.
+        (pytest.lazy_fixture('url_comment_delete'), None, 5),
+    ),
+)
+def test_comment_write_query_budget(
+    author_client, url, data, expected_queries, django_assert_num_queries
+):
+    """Создание, правка и удаление комментария укладываются в бюджет."""
+    with django_assert_num_queries(expected_queries):
+        response = author_client.post(url, data)
+    assert response.status_code == HTTPStatus.FOUND
+
+
+@pytest.mark.django_db(transaction=True)
+def test_reads_go_to_replica(news, client, url_news_detail, replica):
+    """Анонимное чтение идёт с реплики, которая отстаёт от основной базы."""
+    News.objects.filter(pk=news.pk).update(title='Свежий заголовок')
+    response = client.get(url_news_detail)
+    assert response.context['news'].title == news.title
+    replica()
+    News.objects.get(pk=news.pk).save()
+    response = client.get(url_news_detail)
+    assert response.context['news'].title == 'Свежий заголовок'
+
+
+@pytest.mark.django_db(transaction=True)
+def test_writer_sticks_to_primary(
+    author_client, not_author_client, url_news_detail, form_data, replica
+):
+    """
+    После записи автор читает из основной базы и видит свой комментарий,
+    остальные видят его только когда реплика догонит основную базу.
+    """
+    author_client.post(url_news_detail, data=form_data)
+    comment = Comment.objects.using('default').get()
+    response = author_client.get(url_news_detail)
+    assert list(response.context['comments']) == [comment]
+    edit_url = reverse('news:edit', args=(comment.id,))
+    response = author_client.post(edit_url, data={'text': 'Новый текст'})
+    assert response.status_code == HTTPStatus.FOUND
+    response = not_author_client.get(url_news_detail)
+    assert list(response.context['comments']) == []
+    replica()
+    response = not_author_client.get(url_news_detail)
+    assert [item.text for item in response.context['comments']] == [
+        'Новый текст'
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_replica_is_not_written(
+    author_client, url_news_detail, form_data, replica
+):
+    """Все записи, включая прочитанное с реплики, идут в основную базу."""
+    author_client.post(url_news_detail, data=form_data)
+    with connections['replica'].cursor() as cursor:
+        cursor.execute('SELECT COUNT(*) FROM news_comment')
+        assert cursor.fetchone()[0] == 0
+    assert Comment.objects.using('default').count() == 1
+
+
+def test_purge_news_command(comments, news):
+    """purge_news удаляет комментарии пачками и сообщает о ходе удаления."""
+    output = StringIO()
+    call_command('purge_news', news.pk, chunk_size=3, stdout=output)
+    assert [
+        line for line in output.getvalue().splitlines()
+        if line.startswith('Удалено')
+    ] == [f'Удалено комментариев: {count}' for count in (3, 6, 9, 10)]
+    assert not News.objects.exists()
+    assert not Comment.objects.exists()
+
+
+def test_purge_user_command(author, not_author, comments, news):
+    """purge_user удаляет комментарии автора и поправляет счётчики."""
+    Comment.objects.create(news=news, author=not_author, text='Останется')
+    call_command(
+        'purge_user', author.username, chunk_size=4, stdout=StringIO()
+    )
+    news.refresh_from_db()
+    assert news.comment_count == 1
+    assert list(Comment.objects.values_list('text', flat=True)) == [
+        'Останется'
+    ]
+    assert not type(author).objects.filter(pk=author.pk).exists()
+
+
+def test_purge_user_in_shards(author, not_author, author_client,
+                              comment_shards):
+    """Комментарии автора удаляются из всех шардов."""
+    all_news = [
+        News.objects.create(title=f'Новость {index}', text='Текст')
+        for index in range(2)
+    ]
+    for item in all_news:
+        author_client.post(
+            reverse('news:detail', args=(item.pk,)), data={'text': 'Спам'}
+        )
+    call_command('purge_user', author.username, stdout=StringIO())
+    for alias in comment_shards:
+        assert not Comment.objects.using(alias).exists()
+    for item in all_news:
+        item.refresh_from_db()
+        assert item.comment_count == 0
+
+
+def test_admin_purge_action(admin_client, comments, news):
+    """Действие в админке удаляет новость вместе с комментариями."""
+    response = admin_client.post(
+        reverse('admin:news_news_changelist'),
+        {'action': 'purge_selected', '_selected_action': [news.pk]},
+    )
+    assert response.status_code == HTTPStatus.FOUND
+    assert not News.objects.exists()
+    assert not Comment.objects.exists()
+
+
+def test_admin_purge_action_is_limited(admin_client, settings, comments,
+                                       news):
+    """Новость с большим числом комментариев админка не удаляет."""
+    settings.NEWS_ADMIN_PURGE_MAX_COMMENTS = 5
+    response = admin_client.post(
+        reverse('admin:news_news_changelist'),
+        {'action': 'purge_selected', '_selected_action': [news.pk]},
+        follow=True,
+    )
+    assert f'manage.py purge_news {news.pk}' in response.content.decode()
+    assert News.objects.filter(pk=news.pk).exists()
+    assert Comment.objects.count() == 10
+
+
+def test_archive_comments_command(comments, news):
+    """
+    archive_comments переносит старые комментарии в архив пачками
+    с теми же id, счётчик комментариев новости не меняется.
+    """
+    old = list(Comment.objects.order_by('created')[:6])
+    Comment.objects.filter(pk__in=[item.pk for item in old]).update(
+        created=F('created') - timedelta(days=100)
+    )
+    output = StringIO()
+    call_command(
+        'archive_comments', older_than=30, chunk_size=4, stdout=output
+    )
+    assert [
+        line for line in output.getvalue().splitlines()
+        if line.startswith('Перенесено')
+    ] == ['Перенесено в архив: 4', 'Перенесено в архив: 6']
+    assert list(ArchivedComment.objects.values_list('pk', 'text')) == [
+        (item.pk, item.text) for item in old
+    ]
+    assert Comment.objects.count() == 4
+    news.refresh_from_db()
+    assert (news.comment_count, news.archived_count) == (10, 6)
+
+
+def test_archive_comments_can_be_repeated(archived_comments, news):
+    """
+    Повторный запуск ничего не переносит, а строка, уже скопированная
+    в архив прерванным запуском, только удаляется из рабочей таблицы.
+    """
+    leftover = Comment.objects.order_by('created').first()
+    Comment.objects.filter(pk=leftover.pk).update(
+        created=F('created') - timedelta(days=100)
+    )
+    leftover.refresh_from_db()
+    ArchivedComment.objects.create(
+        id=leftover.pk, news=news, author=leftover.author,
+        text=leftover.text, created=leftover.created,
+    )
+    call_command('archive_comments', older_than=30, stdout=StringIO())
+    call_command('archive_comments', older_than=30, stdout=StringIO())
+    assert ArchivedComment.objects.count() == 7
+    assert Comment.objects.count() == 3
+    news.refresh_from_db()
+    assert news.archived_count == 6
+
+
+def test_archive_comments_keeps_conflicting_rows(
+    archived_comments, news, not_author
+):
+    """
+    Если id комментария в архиве занят другим комментарием,
+    комментарий остаётся в рабочей таблице, а команда сообщает об этом.
+    """
+    comment = Comment.objects.order_by('created').first()
+    ArchivedComment.objects.create(
+        id=comment.pk, news=news, author=not_author,
+        text='Другой', created=comment.created - timedelta(days=200),
+    )
+    Comment.objects.filter(pk=comment.pk).update(
+        created=F('created') - timedelta(days=100)
+    )
+    errors = StringIO()
+    call_command(
+        'archive_comments', older_than=30, stdout=StringIO(), stderr=errors
+    )
+    assert f'Комментарий {comment.pk} из базы default' in errors.getvalue()
+    assert Comment.objects.filter(pk=comment.pk).exists()
+    assert ArchivedComment.objects.get(pk=comment.pk).text == 'Другой'
+
+
+def test_archive_comments_from_shards(author_client, comment_shards):
+    """Комментарии переносятся в архив основной базы из всех шардов."""
+    all_news = [
+        News.objects.create(title=f'Новость {index}', text='Текст')
+        for index in range(2)
+    ]
+    for item in all_news:
+        author_client.post(
+            reverse('news:detail', args=(item.pk,)), data={'text': 'Старый'}
+        )
+    for alias in comment_shards:
+        Comment.objects.using(alias).update(
+            created=F('created') - timedelta(days=100)
+        )
+    call_command('archive_comments', older_than=30, stdout=StringIO())
+    for alias in comment_shards:
+        assert not Comment.objects.using(alias).exists()
+    for item in all_news:
+        item.refresh_from_db()
+        assert item.archived_count == 1
+        assert item.archived_comments.get().text == 'Старый'
+
+
+def test_recount_comments_with_archive(archived_comments, news):
+    """recount_comments учитывает архивные комментарии."""
+    News.objects.update(comment_count=0, archived_count=0)
+    call_command('recount_comments', stdout=StringIO())
+    news.refresh_from_db()
+    assert (news.comment_count, news.archived_count) == (10, 6)
+
+
+def test_purge_news_with_archive(archived_comments, news):
+    """purge_news удаляет и архивные комментарии новости."""
+    call_command('purge_news', news.pk, stdout=StringIO())
+    assert not Comment.objects.exists()
+    assert not ArchivedComment.objects.exists()
+
+
+def test_purge_user_with_archive(author, not_author, archived_comments,
+                                 news):
+    """purge_user удаляет архивные комментарии автора и их счётчики."""
+    Comment.objects.create(news=news, author=not_author, text='Останется')
+    call_command('purge_user', author.username, stdout=StringIO())
+    assert not ArchivedComment.objects.exists()
+    news.refresh_from_db()
+    assert (news.comment_count, news.archived_count) == (1, 0)
+
+
+def test_archived_comment_delete_updates_counts(archived_comments, news):
+    """Удаление архивного комментария уменьшает оба счётчика новости."""
+    ArchivedComment.objects.first().delete()
+    news.refresh_from_db()
+    assert (news.comment_count, news.archived_count) == (9, 5)
@@ -1,15 +1,20 @@
 from http import HTTPStatus
 
 import pytest
+from django.contrib.sessions.backends.db import SessionStore
+from django.test import RequestFactory
 from django.urls import reverse
 from pytest_django.asserts import assertRedirects
 
+from news import views
+
 
 @pytest.mark.django_db
 @pytest.mark.parametrize(
     'name, args',
     (
         ('news:detail', pytest.lazy_fixture('id_for_args')),
+        ('news:comments', pytest.lazy_fixture('id_for_args')),
         ('news:home', None),
         ('users:login', None),
         ('users:logout', None),
@@ -26,6 +31,33 @@ def test_pages_availability(client, name, args):
     assert response.status_code == HTTPStatus.OK
 
 
+def test_detail_dispatch_reuses_views(
+    author_client, form_data, monkeypatch, url_news_detail
+):
+    """Страница новости не собирает представления заново на каждый запрос."""
+    def fail(*args, **kwargs):
+        raise AssertionError('as_view() вызван во время запроса')
+
+    monkeypatch.setattr(views.NewsDetail, 'as_view', fail)
+    monkeypatch.setattr(views.NewsComment, 'as_view', fail)
+    assert author_client.get(url_news_detail).status_code == HTTPStatus.OK
+    response = author_client.post(url_news_detail, form_data)
+    assert response.status_code == HTTPStatus.FOUND
+
+
+@pytest.mark.django_db
+def test_bad_comments_cursor_returns_not_found(client, url_news_comments):
+    """Битый курсор на странице комментариев даёт ошибку 404."""
+    response = client.get(url_news_comments, {'cursor': 'не курсор'})
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.django_db
+def test_comments_of_missing_news_return_not_found(client):
+    response = client.get(reverse('news:comments', args=(404,)))
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
 @pytest.mark.parametrize(
     'name',
     ('news:edit', 'news:delete')
@@ -66,3 +98,64 @@ def test_availability_for_comment_edit_and_delete(
     url = reverse(name, args=(comment.id,))
     response = parametrized_client.get(url)
     assert response.status_code == expected_status
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    'parametrized_client',
+    (pytest.lazy_fixture('client'), pytest.lazy_fixture('author_client'))
+)
+@pytest.mark.parametrize(
+    'url',
+    (pytest.lazy_fixture('url_home'), pytest.lazy_fixture('url_news_detail'))
+)
+def test_unchanged_page_returns_not_modified(
+    comment, parametrized_client, url
+):
+    """
+    Неизменившаяся главная и страница новости отдают 304
+    и анонимному, и авторизованному пользователю.
+    """
+    response = parametrized_client.get(url)
+    assert response.status_code == HTTPStatus.OK
+    etag = response['ETag']
+    last_modified = response['Last-Modified']
+    response = parametrized_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert response['ETag'] == etag
+    response = parametrized_client.get(
+        url, HTTP_IF_MODIFIED_SINCE=last_modified
+    )
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    'url',
+    (pytest.lazy_fixture('url_home'), pytest.lazy_fixture('url_news_detail'))
+)
+def test_new_comment_changes_etag(
+    author_client, client, news, form_data, url, url_news_detail
+):
+    """После нового комментария старый ETag больше не подходит."""
+    anonymous_etag = client.get(url)['ETag']
+    author_etag = author_client.get(url)['ETag']
+    assert anonymous_etag != author_etag
+    author_client.post(url_news_detail, form_data)
+    for parametrized_client, etag in (
+        (client, anonymous_etag),
+        (author_client, author_etag),
+    ):
+        response = parametrized_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK
+
+
+@pytest.mark.django_db
+def test_etag_without_session_key(author, news, url_home):
+    """Авторизованный запрос без ключа сессии тоже получает ETag."""
+    request = RequestFactory().get(url_home)
+    request.user = author
+    request.session = SessionStore()
+    response = views.NewsList.as_view()(request)
+    assert response.status_code == HTTPStatus.OK
+    assert response['ETag'].endswith(f'-{author.pk}"')
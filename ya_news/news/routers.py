@@ -0,0 +1,117 @@
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+from .sharding import comment_shards, is_sharded, shard_for_news
+
+
+@dataclass
+class RequestState:
+    """Что известно о базах в рамках одного запроса."""
+    use_primary: bool = False
+    written: bool = False
+
+
+_state = ContextVar('news_db_state', default=None)
+
+
+def start_request(use_primary):
+    return _state.set(RequestState(use_primary=use_primary))
+
+
+def finish_request(token):
+    """Сбрасывает состояние и сообщает, была ли в запросе запись."""
+    state = _state.get()
+    _state.reset(token)
+    return state.written
+
+
+class ReplicaRouter:
+    """
+    Чтение новостей и комментариев с реплики, запись — в основную базу.
+
+    Реплика задаётся настройкой NEWS_REPLICA_DATABASE; без неё
+    роутер ничего не меняет. Пользователи и сессии всегда читаются
+    из основной базы. Запрос, в котором что-то записано,
+    и следующие запросы того же клиента читают из основной базы,
+    пока реплика могла не догнать изменения.
+    """
+
+    route_app_labels = {'news'}
+
+    def db_for_read(self, model, **hints):
+        replica = settings.NEWS_REPLICA_DATABASE
+        if not replica or model._meta.app_label not in self.route_app_labels:
+            return None
+        state = _state.get()
+        if state is not None and state.use_primary:
+            return DEFAULT_DB_ALIAS
+        return replica
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.written = True
+            state.use_primary = True
+        # Объект, прочитанный с реплики, всё равно пишется в основную базу.
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        """Реплика — копия основной базы, связи между ними допустимы."""
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        """Схема на реплику приходит вместе с репликацией."""
+        if db == settings.NEWS_REPLICA_DATABASE:
+            return False
+        return None
+
+
+class CommentShardRouter:
+    """
+    Комментарии в шардах из COMMENT_SHARDS, остальное — в основной базе.
+
+    Новый комментарий пишется в шард своей новости, а прочитанный —
+    обратно туда, откуда прочитан. Запросы без объекта роутер
+    направить не может: в какой шард идти, решают функции
+    из news.sharding. Пока COMMENT_SHARDS = ['default'],
+    роутер ничего не меняет.
+    """
+
+    def is_comment(self, model):
+        return model._meta.concrete_model._meta.label == 'news.Comment'
+
+    def db_for_read(self, model, **hints):
+        if not is_sharded():
+            return None
+        instance = hints.get('instance')
+        if self.is_comment(model):
+            return instance._state.db if instance is not None else None
+        # Автор и новость комментария из шарда лежат в основной базе.
+        if instance is not None and instance._state.db != DEFAULT_DB_ALIAS:
+            return DEFAULT_DB_ALIAS
+        return None
+
+    def db_for_write(self, model, **hints):
+        if not is_sharded() or not self.is_comment(model):
+            return None
+        instance = hints.get('instance')
+        # Подсказкой может быть и новость, которую присваивают комментарию.
+        if not isinstance(instance, model):
+            return None
+        if instance._state.adding:
+            return shard_for_news(instance.news_id)
+        return instance._state.db
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if is_sharded():
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        """В шардах, кроме основной базы, есть только комментарии."""
+        if db == DEFAULT_DB_ALIAS or db not in comment_shards():
+            return None
+        return app_label == 'news' and model_name == 'comment'
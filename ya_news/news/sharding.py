@@ -0,0 +1,94 @@
+from bisect import bisect_right
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Шард с номером i выдаёт id комментариев начиная с i * SHARD_ID_SPAN,
+# поэтому id уникальны сразу во всех шардах.
+SHARD_ID_SPAN = 2 ** 40
+
+
+def comment_shards():
+    return list(settings.COMMENT_SHARDS)
+
+
+def is_sharded():
+    """Комментарии лежат не только в основной базе."""
+    return comment_shards() != [DEFAULT_DB_ALIAS]
+
+
+def shard_for_news(news_id):
+    """
+    Псевдоним базы, где хранятся комментарии новости.
+
+    При COMMENT_SHARDING = 'hash' шард — остаток от деления news_id
+    на число шардов. При 'range' COMMENT_SHARD_RANGES — возрастающие
+    границы news_id: новости меньше первой границы лежат в первом
+    шарде, от первой до второй — во втором и так далее.
+    """
+    shards = comment_shards()
+    if settings.COMMENT_SHARDING == 'range':
+        index = bisect_right(settings.COMMENT_SHARD_RANGES, news_id)
+        return shards[min(index, len(shards) - 1)]
+    return shards[news_id % len(shards)]
+
+
+def news_comments(news_id):
+    """Комментарии новости: запрос всегда идёт в один шард."""
+    from .models import Comment
+
+    queryset = Comment.objects.filter(news_id=news_id)
+    if not is_sharded():
+        return queryset.select_related('author')
+    alias = shard_for_news(news_id)
+    queryset = queryset.using(alias)
+    if alias == DEFAULT_DB_ALIAS:
+        return queryset.select_related('author')
+    # Пользователи лежат в основной базе: JOIN с шардом невозможен.
+    return queryset.prefetch_related('author')
+
+
+def fan_out(queryset):
+    """Тот же запрос к каждому шарду комментариев."""
+    if not is_sharded():
+        return [queryset]
+    return [queryset.using(alias) for alias in comment_shards()]
+
+
+def find_comment(queryset, pk):
+    """Комментарий по id: шард по id не известен, спрашиваем все."""
+    for part in fan_out(queryset.filter(pk=pk)):
+        comment = part.first()
+        if comment is not None:
+            return comment
+    return None
+
+
+def reserve_shard_ids(using):
+    """
+    Сдвигает счётчик id комментариев шарда в его диапазон.
+
+    Работает для SQLite: таблица с AUTOINCREMENT берёт следующий id
+    из sqlite_sequence.
+    """
+    shards = comment_shards()
+    if using not in shards or connections[using].vendor != 'sqlite':
+        return
+    start = shards.index(using) * SHARD_ID_SPAN
+    if not start:
+        return
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            "SELECT seq FROM sqlite_sequence WHERE name = 'news_comment'"
+        )
+        row = cursor.fetchone()
+        if row is None:
+            cursor.execute(
+                'INSERT INTO sqlite_sequence (name, seq) '
+                "VALUES ('news_comment', %s)", (start,)
+            )
+        elif row[0] < start:
+            cursor.execute(
+                'UPDATE sqlite_sequence SET seq = %s '
+                "WHERE name = 'news_comment'", (start,)
+            )
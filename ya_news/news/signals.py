@@ -0,0 +1,94 @@
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.db.models.signals import (
+    post_delete, post_migrate, post_save, pre_delete
+)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .cache import invalidate_news_pages
+from .models import ArchivedComment, Comment, News
+from .sharding import fan_out, is_sharded, reserve_shard_ids, shard_for_news
+
+
+@receiver(post_save, sender=Comment)
+def update_news_on_comment_save(
+    sender, instance, created, raw=False, **kwargs
+):
+    """
+    Новый комментарий увеличивает счётчик у новости,
+    а любое изменение комментария обновляет время изменения новости.
+    """
+    if raw:
+        return
+    changes = {'modified': timezone.now()}
+    if created:
+        changes['comment_count'] = F('comment_count') + 1
+    News.objects.filter(pk=instance.news_id).update(**changes)
+
+
+@receiver(post_delete, sender=Comment)
+def update_news_on_comment_delete(sender, instance, **kwargs):
+    """Удалённый комментарий уменьшает счётчик у новости."""
+    News.objects.filter(pk=instance.news_id).update(
+        comment_count=Greatest(F('comment_count') - 1, 0),
+        modified=timezone.now(),
+    )
+
+
+@receiver(post_delete, sender=ArchivedComment)
+def update_news_on_archived_comment_delete(sender, instance, **kwargs):
+    """Удалённый архивный комментарий уменьшает оба счётчика новости."""
+    News.objects.filter(pk=instance.news_id).update(
+        comment_count=Greatest(F('comment_count') - 1, 0),
+        archived_count=Greatest(F('archived_count') - 1, 0),
+        modified=timezone.now(),
+    )
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+@receiver(post_delete, sender=ArchivedComment)
+def invalidate_comment_pages(sender, instance, **kwargs):
+    """Любое изменение комментария сбрасывает кэш страниц его новости."""
+    invalidate_news_pages(instance.news_id)
+
+
+@receiver(post_save, sender=News)
+@receiver(post_delete, sender=News)
+def invalidate_news_pages_on_change(sender, instance, **kwargs):
+    invalidate_news_pages(instance.pk)
+
+
+@receiver(pre_delete, sender=News)
+def delete_sharded_news_comments(sender, instance, **kwargs):
+    """Каскад из основной базы не видит комментарии в других шардах."""
+    if is_sharded():
+        Comment.objects.using(shard_for_news(instance.pk)).filter(
+            news_id=instance.pk
+        ).delete()
+
+
+@receiver(pre_delete, sender=settings.AUTH_USER_MODEL)
+def delete_sharded_author_comments(sender, instance, **kwargs):
+    if is_sharded():
+        for comments in fan_out(Comment.objects.filter(author=instance)):
+            comments.delete()
+
+
+@receiver(post_migrate)
+def reserve_comment_ids(sender, using, **kwargs):
+    if sender.label == 'news':
+        reserve_shard_ids(using)
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    """Применяет SQLITE_PRAGMAS к каждому новому соединению с SQLite."""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
@@ -1,49 +1,228 @@
+from hashlib import md5
+from http import HTTPStatus
+
 from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core.cache import cache
+from django.db.models import Max, Sum
+from django.http import Http404
 from django.shortcuts import get_object_or_404
 from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
 from django.views import generic
 
+from .cache import HOME_PAGE_KEY, detail_page_key
 from .forms import CommentForm
-from .models import Comment, News
+from .models import ArchivedComment, Comment, News
+from .pagination import paginate_with_archive
+from .sharding import find_comment, is_sharded, news_comments
+
+
+class AnonymousCacheMixin:
+    """
+    Готовая страница для анонимных читателей берётся из кэша.
+
+    Авторизованным пользователям страница собирается заново:
+    у них на ней форма комментария и ссылки на свои комментарии.
+    """
+    cache_key = None
+
+    def get_cache_key(self):
+        return self.cache_key
+
+    def get(self, request, *args, **kwargs):
+        if request.user.is_authenticated or request.GET:
+            return super().get(request, *args, **kwargs)
+        key = self.get_cache_key()
+        response = cache.get(key)
+        if response is not None:
+            # Кэш сбрасывается вместе со сменой валидаторов,
+            # поэтому сохранённым ETag можно верить без запроса к базе.
+            return get_conditional_response(
+                request,
+                etag=response.get('ETag'),
+                last_modified=parse_http_date_safe(
+                    response.get('Last-Modified')
+                ),
+                response=response,
+            )
+        response = super().get(request, *args, **kwargs)
+        patch_vary_headers(response, ('Cookie',))
+        if response.status_code == HTTPStatus.OK:
+            response.add_post_render_callback(
+                lambda rendered: cache.set(
+                    key, rendered, settings.NEWS_CACHE_TIMEOUT
+                )
+            )
+        return response
+
+
+class ConditionalGetMixin:
+    """
+    Отвечает 304, если страница не менялась, не собирая шаблон.
+
+    Валидаторы считаются одним запросом по полю News.modified,
+    которое обновляется при любом изменении новости и её комментариев.
+    """
+
+    def get_validators(self):
+        """
+        Время изменения страницы и её ключ для ETag.
+
+        Переопределяется в представлении. None — валидаторов нет,
+        страница отдаётся как обычно.
+        """
+        return None
+
+    def get_etag_owner(self):
+        user = self.request.user
+        if not user.is_authenticated:
+            return 'anonymous'
+        session_key = self.request.session.session_key
+        if session_key is None:
+            # Сессия ещё не сохранена: токена CSRF в ней тоже нет.
+            return str(user.pk)
+        # Страница зависит от пользователя и его сессии (токен CSRF).
+        session = md5(session_key.encode()).hexdigest()
+        return f'{user.pk}-{session[:8]}'
+
+    def get_page(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+    def get(self, request, *args, **kwargs):
+        validators = self.get_validators()
+        if validators is None:
+            return self.get_page(request, *args, **kwargs)
+        last_modified, key = validators
+        etag = quote_etag(
+            f'{key}-{last_modified.timestamp()}-{self.get_etag_owner()}'
+        )
+        timestamp = int(last_modified.timestamp())
+        response = get_conditional_response(
+            request, etag=etag, last_modified=timestamp
+        )
+        if response is None:
+            response = self.get_page(request, *args, **kwargs)
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(timestamp)
+        patch_vary_headers(response, ('Cookie',))
+        return response
 
 
-class NewsList(generic.ListView):
+class NewsList(AnonymousCacheMixin, ConditionalGetMixin, generic.ListView):
     """Список новостей."""
     model = News
     template_name = 'news/home.html'
+    cache_key = HOME_PAGE_KEY
 
     def get_queryset(self):
         """
         Выводим только несколько последних новостей.
 
         Их количество определяется в настройках проекта.
+        Количество комментариев хранится в самой новости,
+        таблицу комментариев не трогаем.
         """
-        return self.model.objects.prefetch_related(
-            'comment_set'
-        )[:settings.NEWS_COUNT_ON_HOME_PAGE]
+        return self.model.objects.all()[:settings.NEWS_COUNT_ON_HOME_PAGE]
+
+    def get_validators(self):
+        """
+        Валидаторы считаем только по новостям с главной страницы.
+
+        Сумма их id меняется, когда новость уходит с главной
+        или удаляется, даже если время изменения осталось прежним.
+        """
+        validators = self.get_queryset().aggregate(
+            modified=Max('modified'), ids=Sum('pk')
+        )
+        if validators['modified'] is None:
+            return None
+        return validators['modified'], f'home-{validators["ids"]}'
+
 
+class CommentPageMixin:
+    """
+    Постраничный вывод комментариев к новости по курсору.
 
-class NewsDetail(generic.DetailView):
+    Старые комментарии читаются из архива, пока новость
+    в нём что-то хранит (has_archive) или курсор указывает в архив.
+    """
+
+    def get_comment_page(self, news_id, has_archive=False):
+        cursor = self.request.GET.get('cursor')
+        try:
+            comments, next_cursor = paginate_with_archive(
+                news_comments(news_id),
+                ArchivedComment.objects.filter(
+                    news_id=news_id
+                ).select_related('author'),
+                cursor,
+                settings.COMMENTS_COUNT_ON_NEWS_PAGE,
+                has_archive,
+            )
+        except ValueError as error:
+            raise Http404(error)
+        return {
+            'news_id': news_id,
+            'comments': comments,
+            'next_cursor': next_cursor,
+        }
+
+
+class NewsDetail(
+        AnonymousCacheMixin,
+        ConditionalGetMixin,
+        CommentPageMixin,
+        generic.DetailView
+):
     model = News
     template_name = 'news/detail.html'
 
-    def get_object(self, queryset=None):
-        obj = get_object_or_404(
-            self.model.objects.prefetch_related('comment_set__author'),
-            pk=self.kwargs['pk']
-        )
-        return obj
+    def get_cache_key(self):
+        return detail_page_key(self.kwargs['pk'])
+
+    def get_validators(self):
+        pk = self.kwargs['pk']
+        modified = self.model.objects.filter(pk=pk).values_list(
+            'modified', flat=True
+        ).first()
+        if modified is None:
+            return None
+        return modified, f'news-{pk}'
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
+        context.update(self.get_comment_page(
+            self.object.pk, self.object.archived_count > 0
+        ))
         if self.request.user.is_authenticated:
             context['form'] = CommentForm()
         return context
 
 
+class NewsCommentList(CommentPageMixin, generic.TemplateView):
+    """Следующая страница комментариев для кнопки «Показать ещё»."""
+    template_name = 'news/comments.html'
+
+    def get_context_data(self, **kwargs):
+        """
+        Новость нужна ради archived_count: без курсора страница
+        начинается с архива, если в нём что-то есть.
+        """
+        context = super().get_context_data(**kwargs)
+        news = get_object_or_404(
+            News.objects.only('archived_count'), pk=self.kwargs['pk']
+        )
+        context.update(self.get_comment_page(
+            news.pk, news.archived_count > 0
+        ))
+        return context
+
+
 class NewsComment(
         LoginRequiredMixin,
+        CommentPageMixin,
         generic.detail.SingleObjectMixin,
         generic.FormView
 ):
@@ -55,6 +234,13 @@ class NewsComment(
         self.object = self.get_object()
         return super().post(request, *args, **kwargs)
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context.update(self.get_comment_page(
+            self.object.pk, self.object.archived_count > 0
+        ))
+        return context
+
     def form_valid(self, form):
         comment = form.save(commit=False)
         comment.news = self.object
@@ -63,19 +249,23 @@ class NewsComment(
         return super().form_valid(form)
 
     def get_success_url(self):
-        post = self.get_object()
-        return reverse('news:detail', kwargs={'pk': post.pk}) + '#comments'
+        return reverse(
+            'news:detail', kwargs={'pk': self.object.pk}
+        ) + '#comments'
 
 
 class NewsDetailView(generic.View):
+    """На GET показывает новость, на POST добавляет к ней комментарий."""
+    # Представления собираются один раз при загрузке модуля,
+    # а не заново на каждый запрос.
+    detail_view = staticmethod(NewsDetail.as_view())
+    comment_view = staticmethod(NewsComment.as_view())
 
     def get(self, request, *args, **kwargs):
-        view = NewsDetail.as_view()
-        return view(request, *args, **kwargs)
+        return self.detail_view(request, *args, **kwargs)
 
     def post(self, request, *args, **kwargs):
-        view = NewsComment.as_view()
-        return view(request, *args, **kwargs)
+        return self.comment_view(request, *args, **kwargs)
 
 
 class CommentBase(LoginRequiredMixin):
@@ -83,15 +273,27 @@ class CommentBase(LoginRequiredMixin):
     model = Comment
 
     def get_success_url(self):
-        comment = self.get_object()
+        """
+        Комментарий уже загружен в self.object: повторно его не ищем,
+        а для адреса хватает news_id без запроса самой новости.
+        """
         return reverse(
-            'news:detail', kwargs={'pk': comment.news.pk}
+            'news:detail', kwargs={'pk': self.object.news_id}
         ) + '#comments'
 
     def get_queryset(self):
         """Пользователь может работать только со своими комментариями."""
         return self.model.objects.filter(author=self.request.user)
 
+    def get_object(self, queryset=None):
+        """При шардировании комментарий ищется во всех шардах."""
+        if queryset is not None or not is_sharded():
+            return super().get_object(queryset)
+        comment = find_comment(self.get_queryset(), self.kwargs['pk'])
+        if comment is None:
+            raise Http404('Комментарий не найден')
+        return comment
+
 
 class CommentUpdate(CommentBase, generic.UpdateView):
     """Редактирование комментария."""
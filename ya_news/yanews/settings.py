@@ -23,6 +23,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
+    'news.middleware.ReplicaStickinessMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
@@ -55,6 +56,35 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Соединение живёт между запросами, а не открывается заново.
+        'CONN_MAX_AGE': 60,
+    }
+}
+
+# PRAGMA для каждого нового соединения с SQLite: busy_timeout (мс)
+# ждёт освобождения базы вместо ошибки «database is locked»,
+# cache_size < 0 — размер в КБ. Режим WAL, в котором читатели
+# не ждут писателя, хранится в самом файле базы и включается
+# один раз миграцией, а не при каждом соединении.
+SQLITE_PRAGMAS = {
+    'busy_timeout': 5000,
+    'synchronous': 'normal',
+    'cache_size': -20000,
+    'mmap_size': 128 * 2 ** 20,
+}
+
+DATABASE_ROUTERS = [
+    'news.routers.CommentShardRouter',
+    'news.routers.ReplicaRouter',
+]
+
+# Кэш страниц общий для всех процессов: сброс после комментария
+# или команды (purge_*, archive_comments, recount_comments) виден
+# каждому воркеру. Вместо файлов подойдёт memcached или redis.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache',
     }
 }
 
@@ -80,3 +110,30 @@ LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('news:home')
 
 NEWS_COUNT_ON_HOME_PAGE = 10
+COMMENTS_COUNT_ON_NEWS_PAGE = 20
+# Сколько секунд хранить страницы для анонимных читателей.
+NEWS_CACHE_TIMEOUT = 60 * 5
+# Действие «удалить пачками» в админке работает внутри запроса,
+# поэтому только для выборок с таким числом комментариев;
+# остальное удаляют команды purge_news и purge_user.
+NEWS_ADMIN_PURGE_MAX_COMMENTS = 1000
+
+# Файл со списком запрещённых слов, по слову в строке.
+# Изменения подхватываются без перезапуска; без файла
+# используется встроенный список news.forms.BAD_WORDS.
+BAD_WORDS_FILE = None
+
+# Псевдоним базы-реплики из DATABASES для чтения новостей и комментариев;
+# None — всё читается из default. После записи клиент столько секунд
+# читает из основной базы, пока реплика догоняет изменения.
+NEWS_REPLICA_DATABASE = None
+NEWS_REPLICA_STICKY_SECONDS = 10
+
+# Псевдонимы баз из DATABASES, по которым раскладываются комментарии.
+# COMMENT_SHARDING: 'hash' — news_id по модулю числа шардов,
+# 'range' — по возрастающим границам news_id из COMMENT_SHARD_RANGES.
+# После изменения шардов нужно запустить rebalance_comments.
+# Реплика из NEWS_REPLICA_DATABASE для шардов не используется.
+COMMENT_SHARDS = ['default']
+COMMENT_SHARDING = 'hash'
+COMMENT_SHARD_RANGES = []
@@ -0,0 +1 @@
+"""Замеры производительности YaNote, запускаются вручную через python -m."""
@@ -0,0 +1,69 @@
+"""
+Массовое создание заметок с кэшем транслитерации и без него.
+
+Заголовки берутся из небольшого набора, как при импорте,
+где у тысяч заметок одинаковые названия. Заметки пишутся
+через bulk_create во временную базу в памяти.
+
+Запуск из каталога ya_note:
+    python -m benchmarks.bulk_slugs
+"""
+import os
+import time
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yanote.settings')
+django.setup()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.db import connection, transaction  # noqa: E402
+from pytils.translit import slugify  # noqa: E402
+
+from notes.models import Note  # noqa: E402
+from notes.slugs import (  # noqa: E402
+    SLUG_MAX_LENGTH, clear_slug_cache, make_slug, slug_cache_info
+)
+
+NOTES_COUNT = 20_000
+TITLES = [f'Список покупок на неделю номер {index}' for index in range(50)]
+BATCH_SIZE = 500
+
+
+def plain_slug(title):
+    return slugify(title)[:SLUG_MAX_LENGTH]
+
+
+def create_notes(author, slug_function):
+    Note.objects.all().delete()
+    started = time.perf_counter()
+    with transaction.atomic():
+        notes = []
+        for index in range(NOTES_COUNT):
+            title = TITLES[index % len(TITLES)]
+            slug = f'{slug_function(title)}-{index}'
+            notes.append(
+                Note(title=title, text='Текст', slug=slug, author=author)
+            )
+            if len(notes) == BATCH_SIZE:
+                Note.objects.bulk_create(notes)
+                notes = []
+        Note.objects.bulk_create(notes)
+    return time.perf_counter() - started
+
+
+def main():
+    connection.creation.create_test_db(verbosity=0)
+    author = get_user_model().objects.create(username='bench')
+    without_cache = create_notes(author, plain_slug)
+    clear_slug_cache()
+    with_cache = create_notes(author, make_slug)
+    info = slug_cache_info()
+    print(f'Заметок: {NOTES_COUNT}, разных заголовков: {len(TITLES)}')
+    print(f'без кэша: {without_cache:.3f} с')
+    print(f'с кэшем:  {with_cache:.3f} с '
+          f'(попаданий {info.hits}, промахов {info.misses})')
+
+
+if __name__ == '__main__':
+    main()
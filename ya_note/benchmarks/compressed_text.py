@@ -0,0 +1,99 @@
+"""
+Размер базы и время чтения страниц со сжатым текстом заметок и без него.
+
+Часть заметок длинная (сотни килобайт), остальные короткие.
+Без сжатия весь текст пишется строкой: порог поля поднимается
+выше любой заметки. Страницы открываются через тестовый клиент
+с отключённым кэшем заметок.
+
+Запуск из каталога ya_note:
+    python -m benchmarks.compressed_text
+"""
+import os
+import time
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yanote.settings')
+django.setup()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.utils import override_settings  # noqa: E402
+from django.urls import reverse  # noqa: E402
+
+from notes.models import Note  # noqa: E402
+
+LONG_NOTES = 200
+SHORT_NOTES = 2000
+LONG_TEXT = ' '.join(
+    f'Пункт {index}: проверить отчёт, обновить список задач.'
+    for index in range(4000)
+)
+REPEATS = 200
+
+
+def database_size():
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA page_count')
+        (pages,) = cursor.fetchone()
+        cursor.execute('PRAGMA page_size')
+        (page_size,) = cursor.fetchone()
+    return pages * page_size
+
+
+def create_notes(author, threshold):
+    Note.objects.all().delete()
+    with connection.cursor() as cursor:
+        cursor.execute('VACUUM')
+    Note._meta.get_field('text').threshold = threshold
+    Note.objects.bulk_create(
+        Note(title=f'Длинная {index}', text=LONG_TEXT,
+             slug=f'long-{index}', author=author)
+        for index in range(LONG_NOTES)
+    )
+    Note.objects.bulk_create(
+        Note(title=f'Короткая {index}', text='Купить хлеб.',
+             slug=f'short-{index}', author=author)
+        for index in range(SHORT_NOTES)
+    )
+    return database_size()
+
+
+def page_latency(client, url):
+    started = time.perf_counter()
+    for _ in range(REPEATS):
+        client.get(url)
+    return (time.perf_counter() - started) / REPEATS * 1000
+
+
+@override_settings(NOTES_CACHE_ALIAS=None, ALLOWED_HOSTS=['testserver'])
+def measure(author, threshold):
+    size = create_notes(author, threshold)
+    client = Client()
+    client.force_login(author)
+    detail = page_latency(client, reverse('notes:detail', args=('long-7',)))
+    notes_list = page_latency(client, reverse('notes:list'))
+    return size, detail, notes_list
+
+
+def main():
+    connection.creation.create_test_db(verbosity=0)
+    author = get_user_model().objects.create(username='bench')
+    field = Note._meta.get_field('text')
+    default_threshold = field.threshold
+    print(f'Заметок: {LONG_NOTES} по {len(LONG_TEXT.encode()) // 1024} КБ '
+          f'и {SHORT_NOTES} коротких')
+    for name, threshold in (
+        ('без сжатия', 10 ** 9),
+        (f'сжатие от {default_threshold} байт', default_threshold),
+    ):
+        size, detail, notes_list = measure(author, threshold)
+        print(f'{name}: база {size / 2 ** 20:.1f} МБ, '
+              f'заметка {detail:.2f} мс, список {notes_list:.2f} мс')
+    field.threshold = default_threshold
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+from itertools import islice
+
+from django.db import transaction
+from django.utils import timezone
+
+from .cache import evict_notes
+from .models import NoteRow
+from .search import reassign_notes, unindex_notes
+
+DELETED = 'deleted'
+MOVED = 'moved'
+NOT_FOUND = 'not_found'
+
+
+def chunked(items, size):
+    items = iter(items)
+    chunk = list(islice(items, size))
+    while chunk:
+        yield chunk
+        chunk = list(islice(items, size))
+
+
+def delete_notes(queryset, ids):
+    """
+    Удаляет заметки queryset с id из ids одним запросом.
+
+    queryset берётся из NoteRow: обычный delete() с сигналами Note
+    загружал бы заметки и чистил индекс по одной, поэтому индекс
+    чистится здесь одним запросом, а кэш — в вызывающем коде.
+    """
+    queryset.filter(pk__in=ids).delete()
+    unindex_notes(ids)
+
+
+def move_notes(queryset, ids, author):
+    """Передаёт заметки queryset другому пользователю одним запросом."""
+    queryset.filter(pk__in=ids).update(
+        author=author, updated_at=timezone.now()
+    )
+    reassign_notes(ids, author.pk)
+
+
+def apply_batch(queryset, slugs, action, chunk_size, author=None):
+    """
+    Применяет действие к заметкам из queryset по списку slug.
+
+    На каждую пачку из chunk_size slug приходится один запрос
+    на проверку владельца и по одному на изменение заметок
+    и поискового индекса. Проверка и изменение идут в одной
+    транзакции и через тот же queryset, поэтому чужую заметку
+    не изменить, даже если её передали между ними.
+    Возвращает результат для каждого slug.
+    """
+    results = dict.fromkeys(slugs, NOT_FOUND)
+    for chunk in chunked(results, chunk_size):
+        with transaction.atomic():
+            found = list(
+                queryset.filter(slug__in=chunk).values_list(
+                    'id', 'slug', 'author_id'
+                )
+            )
+            if not found:
+                continue
+            ids = [note_id for note_id, _, _ in found]
+            if action == DELETED:
+                delete_notes(queryset, ids)
+            else:
+                move_notes(queryset, ids, author)
+        evict_notes((author_id, slug) for _, slug, author_id in found)
+        for _, slug, _ in found:
+            results[slug] = action
+    return results
+
+
+def purge_author_notes(author, chunk_size, progress=None):
+    """
+    Удаляет все заметки автора пачками в коротких транзакциях.
+
+    progress(deleted) вызывается после каждой пачки.
+    Возвращает число удалённых заметок.
+    """
+    notes = NoteRow.objects.filter(author=author).order_by()
+    deleted = 0
+    while True:
+        with transaction.atomic():
+            rows = list(notes.values_list('id', 'slug')[:chunk_size])
+            if not rows:
+                return deleted
+            delete_notes(notes, [note_id for note_id, _ in rows])
+        evict_notes((author.pk, slug) for _, slug in rows)
+        deleted += len(rows)
+        if progress:
+            progress(deleted)
@@ -0,0 +1,72 @@
+import threading
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import caches
+
+NOTE_KEY = 'notes:note:{author_id}:{slug}'
+
+CacheInfo = namedtuple('CacheInfo', ('hits', 'misses', 'hit_rate'))
+
+_lock = threading.Lock()
+_hits = 0
+_misses = 0
+
+
+def get_cache():
+    """Кэш из NOTES_CACHE_ALIAS или None, если кэш отключён."""
+    alias = settings.NOTES_CACHE_ALIAS
+    return caches[alias] if alias else None
+
+
+def note_key(author_id, slug):
+    return NOTE_KEY.format(author_id=author_id, slug=slug)
+
+
+def _count(hit):
+    global _hits, _misses
+    with _lock:
+        if hit:
+            _hits += 1
+        else:
+            _misses += 1
+
+
+def get_note(author_id, slug, load):
+    """
+    Заметка автора по slug: из кэша, а при промахе — через load().
+
+    Ключ содержит автора, поэтому чужую заметку из кэша получить
+    нельзя. Отсутствующие заметки не кэшируются: load() сам
+    выбрасывает Http404.
+    """
+    cache = get_cache()
+    if cache is None:
+        return load()
+    key = note_key(author_id, slug)
+    note = cache.get(key)
+    _count(note is not None)
+    if note is None:
+        note = load()
+        cache.set(key, note, settings.NOTES_CACHE_TIMEOUT)
+    return note
+
+
+def evict_notes(keys):
+    """Удаляет из кэша заметки по парам (author_id, slug)."""
+    cache = get_cache()
+    if cache is not None:
+        cache.delete_many([note_key(*key) for key in keys])
+
+
+def note_cache_info():
+    """Счётчики кэша заметок в этом процессе: hits, misses, hit_rate."""
+    with _lock:
+        total = _hits + _misses
+        return CacheInfo(_hits, _misses, _hits / total if total else 0.0)
+
+
+def reset_note_cache_info():
+    global _hits, _misses
+    with _lock:
+        _hits = _misses = 0
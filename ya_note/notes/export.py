@@ -0,0 +1,65 @@
+import json
+import zipfile
+
+
+def iter_notes(queryset, chunk_size):
+    """
+    Кортежи (slug, title, text) по одному.
+
+    Из базы читается не больше chunk_size строк за раз,
+    объекты моделей не создаются.
+    """
+    return queryset.order_by('id').values_list(
+        'slug', 'title', 'text'
+    ).iterator(chunk_size=chunk_size)
+
+
+def note_markdown(title, text):
+    """Формат, который понимает команда import_notes."""
+    return f'# {title}\n\n{text}\n'
+
+
+def export_jsonl(notes):
+    """Заметки в формате JSON Lines, строка за строкой."""
+    for slug, title, text in notes:
+        record = {'title': title, 'text': text, 'slug': slug}
+        yield (json.dumps(record, ensure_ascii=False) + '\n').encode()
+
+
+class ChunkWriter:
+    """
+    Файл без seek(), в который zipfile пишет архив.
+
+    Записанные байты забираются методом take(), поэтому в памяти
+    лежит только то, что ещё не отдано клиенту.
+    """
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self):
+        data = b''.join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def export_zip(notes):
+    """
+    Zip-архив с Markdown-файлом на каждую заметку.
+
+    Архив собирается по ходу отдачи: каждый файл сжимается и сразу
+    уходит клиенту, в памяти остаётся только оглавление архива.
+    """
+    writer = ChunkWriter()
+    with zipfile.ZipFile(writer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for slug, title, text in notes:
+            archive.writestr(f'{slug}.md', note_markdown(title, text))
+            yield writer.take()
+    yield writer.take()
@@ -1,9 +1,9 @@
-from pytils.translit import slugify
-
 from django import forms
+from django.conf import settings
 from django.core.exceptions import ValidationError
 
 from .models import Note
+from .slugs import make_slug, unique_slug
 
 WARNING = ' - такой slug уже существует, придумайте уникальное значение!'
 
@@ -16,14 +16,34 @@ class NoteForm(forms.ModelForm):
         fields = ('title', 'text', 'slug')
 
     def clean_slug(self):
-        """Обрабатывает случай, если slug не уникален."""
+        """
+        Формирует slug из заголовка, если он не указан.
+
+        Уникальность не проверяем отдельным запросом: её гарантирует
+        индекс, а конфликт при сохранении превращается в ошибку формы.
+        slug_base — slug без суффикса для повторного подбора.
+        """
         cleaned_data = super().clean()
         slug = cleaned_data.get('slug')
-        if not slug:
+        self.slug_generated = not slug
+        if self.slug_generated:
             title = cleaned_data.get('title')
-            slug = slugify(title)[:100]
-        if Note.objects.filter(
-                slug=slug
-        ).exclude(id=self.instance.pk).exists():
-            raise ValidationError(slug + WARNING)
+            slug = self.slug_base = make_slug(title)
+            if settings.NOTES_SLUG_AUTO_SUFFIX:
+                slug = unique_slug(slug, exclude_pk=self.instance.pk)
         return slug
+
+    def validate_unique(self):
+        """Slug проверяет уникальный индекс при сохранении."""
+        exclude = [
+            field.name for field in self.instance._meta.fields
+            if field.name not in self.fields
+        ]
+        exclude.append('slug')
+        try:
+            self.instance.validate_unique(exclude=exclude)
+        except ValidationError as error:
+            self.add_error(None, error)
+
+    def add_slug_error(self):
+        self.add_error('slug', self.instance.slug + WARNING)
@@ -0,0 +1,206 @@
+import json
+import os
+import time
+from itertools import islice
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.core.validators import validate_slug
+from django.db import IntegrityError, transaction
+
+from notes.models import Note
+from notes.search import index_rows
+from notes.slugs import (
+    SLUG_MAX_LENGTH, make_slug, slug_with_suffix, taken_suffixes
+)
+
+BATCH_SIZE = 1000
+# Сколько раз повторять пачку, если slug заняли параллельно.
+BATCH_ATTEMPTS = 3
+TITLE_FIELD = Note._meta.get_field('title')
+
+
+def read_jsonl(path):
+    """Заметки из файла JSON Lines: объект с title, text и slug на строку."""
+    with open(path, encoding='utf-8') as file:
+        for line_number, line in enumerate(file, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as error:
+                raise CommandError(
+                    f'{path}:{line_number}: некорректный JSON ({error})'
+                )
+            yield record.get('title', ''), record.get('text', ''), str(
+                record.get('slug') or ''
+            )
+
+
+def read_markdown_file(path):
+    """Заголовок — первая строка «# …», иначе имя файла."""
+    text = path.read_text(encoding='utf-8')
+    first_line, _, rest = text.partition('\n')
+    if first_line.startswith('# '):
+        return first_line[2:].strip(), rest.strip(), ''
+    return path.stem, text.strip(), ''
+
+
+def read_markdown(path):
+    if path.is_file():
+        yield read_markdown_file(path)
+        return
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_file() and entry.name.endswith('.md'):
+                yield read_markdown_file(Path(entry.path))
+
+
+def assign_slugs(notes):
+    """
+    Делает slug пачки уникальными.
+
+    Совпадения с базой находятся одним запросом по slug__in,
+    а для каждого занятого slug свободный суффикс ищется
+    одним запросом по диапазону индекса.
+    """
+    wanted = {note.slug for note in notes}
+    existing = set(
+        Note.objects.filter(slug__in=wanted).values_list('slug', flat=True)
+    )
+    used = set()
+    next_suffix = {}
+    for note in notes:
+        base = note.slug
+        if base not in existing and base not in used:
+            used.add(base)
+            continue
+        if base not in next_suffix:
+            next_suffix[base] = taken_suffixes(base)[1] + 1
+        slug = slug_with_suffix(base, next_suffix[base])
+        while slug in used or slug in existing:
+            next_suffix[base] += 1
+            slug = slug_with_suffix(base, next_suffix[base])
+        next_suffix[base] += 1
+        note.slug = slug
+        used.add(slug)
+
+
+def save_batch(notes):
+    """Вставляет пачку одной транзакцией и добавляет её в поисковый индекс."""
+    for attempt in range(1, BATCH_ATTEMPTS + 1):
+        for note in notes:
+            note.slug = note.source_slug
+        assign_slugs(notes)
+        try:
+            with transaction.atomic():
+                Note.objects.bulk_create(notes)
+                ids = dict(
+                    Note.objects.filter(
+                        slug__in=[note.slug for note in notes]
+                    ).values_list('slug', 'pk')
+                )
+                index_rows(
+                    (ids[note.slug], note.author_id, note.title, note.text)
+                    for note in notes
+                )
+            return
+        except IntegrityError:
+            if attempt == BATCH_ATTEMPTS:
+                raise
+
+
+class Command(BaseCommand):
+    help = (
+        'Импортирует заметки пользователя из файла JSON Lines '
+        'или каталога Markdown-файлов пачками через bulk_create.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл .jsonl, .md или каталог .md.')
+        parser.add_argument(
+            '--author', required=True, help='Имя пользователя-владельца.'
+        )
+        parser.add_argument(
+            '--format',
+            choices=('jsonl', 'markdown'),
+            help='Формат входных данных; по умолчанию — по расширению.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help='Сколько заметок вставлять за одну транзакцию.',
+        )
+
+    def get_records(self, path, input_format):
+        if not path.exists():
+            raise CommandError(f'Путь {path} не найден.')
+        if input_format is None:
+            input_format = 'jsonl' if path.suffix == '.jsonl' else 'markdown'
+        if input_format == 'jsonl':
+            return read_jsonl(path)
+        return read_markdown(path)
+
+    def get_slug(self, title, slug):
+        """
+        Slug из файла, обрезанный до длины поля, или из заголовка.
+
+        Некорректный slug (пробелы, «/» и т. п.) сломал бы ссылки
+        на заметку, поэтому он заменяется slug из заголовка,
+        а заметка попадает в отчёт.
+        """
+        if not slug:
+            return make_slug(title)
+        slug = slug[:SLUG_MAX_LENGTH]
+        try:
+            validate_slug(slug)
+        except ValidationError:
+            self.stderr.write(
+                f'Некорректный slug «{slug}» у заметки «{title}»: '
+                f'адрес создан из заголовка.'
+            )
+            return make_slug(title)
+        return slug
+
+    def handle(self, *args, **options):
+        if options['batch_size'] <= 0:
+            raise CommandError('--batch-size должен быть больше нуля.')
+        User = get_user_model()
+        try:
+            author = User.objects.get(username=options['author'])
+        except User.DoesNotExist:
+            raise CommandError(
+                f'Пользователь {options["author"]} не найден.'
+            )
+        records = self.get_records(Path(options['path']), options['format'])
+        batch_size = options['batch_size']
+        imported = 0
+        started = time.perf_counter()
+        while True:
+            notes = []
+            for title, text, slug in islice(records, batch_size):
+                title = (title or TITLE_FIELD.default)[:TITLE_FIELD.max_length]
+                note = Note(
+                    title=title,
+                    text=text,
+                    slug=self.get_slug(title, slug),
+                    author=author,
+                )
+                note.source_slug = note.slug
+                notes.append(note)
+            if not notes:
+                break
+            save_batch(notes)
+            imported += len(notes)
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f'Импортировано заметок: {imported}, '
+                f'{imported / elapsed:.0f} заметок/с'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Импорт завершён: {imported} заметок за '
+            f'{time.perf_counter() - started:.1f} с.'
+        ))
@@ -0,0 +1,43 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from notes.batch import purge_author_notes
+
+CHUNK_SIZE = 500
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет пользователя вместе с заметками пачками '
+        'в коротких транзакциях.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('username', help='Имя пользователя.')
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=CHUNK_SIZE,
+            help='Сколько заметок удалять за одну транзакцию.',
+        )
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(
+                f'Пользователь {options["username"]} не найден.'
+            )
+        deleted = purge_author_notes(
+            user,
+            options['chunk_size'],
+            progress=lambda count: self.stdout.write(
+                f'Удалено заметок: {count}'
+            ),
+        )
+        user.delete()
+        self.stdout.write(self.style.SUCCESS(
+            f'Пользователь {options["username"]} удалён, '
+            f'заметок: {deleted}.'
+        ))
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from notes.models import Note
+from notes.search import clear_index, index_rows
+
+BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = 'Заново строит поисковый индекс заметок пачками.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help='Сколько заметок индексировать за одну транзакцию.',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        clear_index()
+        last_pk = 0
+        indexed = 0
+        while True:
+            rows = list(
+                Note.objects.filter(pk__gt=last_pk).order_by('pk').values_list(
+                    'pk', 'author_id', 'title', 'text'
+                )[:batch_size]
+            )
+            if not rows:
+                break
+            with transaction.atomic():
+                index_rows(rows)
+            last_pk = rows[-1][0]
+            indexed += len(rows)
+            self.stdout.write(f'Проиндексировано заметок: {indexed}')
+        self.stdout.write(
+            self.style.SUCCESS(f'Индекс построен, заметок: {indexed}.')
+        )
@@ -0,0 +1,27 @@
+from django.db import migrations
+
+CREATE_INDEX = '''
+CREATE VIRTUAL TABLE notes_note_fts USING fts5(
+    owner, title, text,
+    tokenize = 'unicode61 remove_diacritics 2'
+)
+'''
+FILL_INDEX = '''
+INSERT INTO notes_note_fts (rowid, owner, title, text)
+SELECT id, 'u' || author_id, title, text FROM notes_note
+'''
+DROP_INDEX = 'DROP TABLE notes_note_fts'
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0002_note_author_id_index'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql=[CREATE_INDEX, FILL_INDEX],
+            reverse_sql=[DROP_INDEX],
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 3.2.15 on 2026-10-18 06:31
+
+from django.db import migrations
+import notes.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0004_note_updated_at'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='note',
+            name='text',
+            field=notes.fields.CompressedTextField(algorithm='zlib', help_text='Добавьте подробностей', threshold=2048, verbose_name='Текст'),
+        ),
+    ]
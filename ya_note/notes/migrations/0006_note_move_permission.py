@@ -0,0 +1,17 @@
+# Generated by Django 3.2.15 on 2026-10-18 07:00
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0005_compress_note_text'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='note',
+            options={'permissions': (('move_note', 'Может передавать заметки другим пользователям'),)},
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 3.2.15 on 2026-10-18 07:00
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0006_note_move_permission'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NoteRow',
+            fields=[
+            ],
+            options={
+                'proxy': True,
+                'indexes': [],
+                'constraints': [],
+            },
+            bases=('notes.note',),
+        ),
+    ]
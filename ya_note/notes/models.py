@@ -1,7 +1,8 @@
 from django.conf import settings
 from django.db import models
 
-from pytils.translit import slugify
+from .fields import CompressedTextField
+from .slugs import SLUG_MAX_LENGTH, make_slug
 
 
 class Note(models.Model):
@@ -11,28 +12,71 @@ class Note(models.Model):
         default='Название заметки',
         help_text='Дайте короткое название заметке'
     )
-    text = models.TextField(
+    text = CompressedTextField(
         'Текст',
         help_text='Добавьте подробностей'
     )
     slug = models.SlugField(
         'Адрес для страницы с заметкой',
-        max_length=100,
+        max_length=SLUG_MAX_LENGTH,
         unique=True,
         blank=True,
         help_text=('Укажите адрес для страницы заметки. Используйте только '
                    'латиницу, цифры, дефисы и знаки подчёркивания')
     )
+    # Индекс по автору заменяет составной индекс из Meta.indexes.
     author = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
+        db_index=False,
     )
+    updated_at = models.DateTimeField('Изменена', auto_now=True)
+
+    class Meta:
+        indexes = (
+            models.Index(fields=('author', 'id'), name='note_author_id_idx'),
+            models.Index(
+                fields=('author', 'updated_at'),
+                name='note_author_updated_idx',
+            ),
+        )
+        permissions = (
+            ('move_note', 'Может передавать заметки другим пользователям'),
+        )
 
     def __str__(self):
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Запоминает автора и slug из базы, чтобы сбросить старый кэш."""
+        note = super().from_db(db, field_names, values)
+        loaded = dict(zip(field_names, values))
+        note.loaded_key = (loaded.get('author_id'), loaded.get('slug'))
+        return note
+
+    def get_cache_keys(self):
+        """Пары (author_id, slug), под которыми заметка может быть в кэше."""
+        keys = {(self.author_id, self.slug)}
+        loaded_key = getattr(self, 'loaded_key', None)
+        if loaded_key and None not in loaded_key:
+            keys.add(loaded_key)
+        return keys
+
     def save(self, *args, **kwargs):
         if not self.slug:
-            max_slug_length = self._meta.get_field('slug').max_length
-            self.slug = slugify(self.title)[:max_slug_length]
+            self.slug = make_slug(self.title)
         super().save(*args, **kwargs)
+
+
+class NoteRow(Note):
+    """
+    Заметка для массовых операций без сигналов.
+
+    Сигналы подключены к Note, поэтому delete() через прокси
+    удаляет строки одним запросом, не загружая заметки.
+    Поисковый индекс и кэш в этом случае обновляет вызывающий код.
+    """
+
+    class Meta:
+        proxy = True
@@ -0,0 +1,128 @@
+import re
+
+from django.db import connections
+from django.utils.html import escape
+
+from .models import Note
+
+FTS_TABLE = 'notes_note_fts'
+# Служебные символы вокруг найденных слов: их не бывает в тексте,
+# поэтому после экранирования HTML их можно заменить на <mark>.
+MATCH_START = '\x02'
+MATCH_END = '\x03'
+SNIPPET_TOKENS = 16
+TOKEN = re.compile(r'\w+')
+
+INSERT_SQL = (
+    f'INSERT INTO {FTS_TABLE} (rowid, owner, title, text) '
+    f'VALUES (%s, %s, %s, %s)'
+)
+DELETE_SQL = f'DELETE FROM {FTS_TABLE} WHERE rowid = %s'
+SEARCH_SQL = f'''
+    SELECT note.id, note.slug, note.title,
+           snippet({FTS_TABLE}, 2, %s, %s, '…', {SNIPPET_TOKENS}) AS snippet
+    FROM {FTS_TABLE}
+    JOIN notes_note AS note ON note.id = {FTS_TABLE}.rowid
+    WHERE {FTS_TABLE} MATCH %s AND note.author_id = %s
+    ORDER BY bm25({FTS_TABLE}, 0.0, 10.0, 1.0)
+    LIMIT %s
+'''
+
+
+def owner_token(author_id):
+    """
+    Токен автора в индексе.
+
+    Поиск пересекает список заметок автора со списками слов
+    внутри FTS-индекса и не перебирает чужие совпадения.
+    """
+    return f'u{author_id}'
+
+
+def note_row(note_id, author_id, title, text):
+    return note_id, owner_token(author_id), title, text
+
+
+def index_note(note, created=False, using='default'):
+    """Добавляет заметку в индекс или обновляет её запись."""
+    with connections[using].cursor() as cursor:
+        if not created:
+            cursor.execute(DELETE_SQL, (note.pk,))
+        cursor.execute(
+            INSERT_SQL,
+            note_row(note.pk, note.author_id, note.title, note.text)
+        )
+
+
+def index_rows(rows, using='default'):
+    """Добавляет пачку строк (id, author_id, title, text) в индекс."""
+    with connections[using].cursor() as cursor:
+        cursor.executemany(INSERT_SQL, [note_row(*row) for row in rows])
+
+
+def unindex_note(note_id, using='default'):
+    with connections[using].cursor() as cursor:
+        cursor.execute(DELETE_SQL, (note_id,))
+
+
+def unindex_notes(note_ids, using='default'):
+    """Удаляет пачку заметок из индекса одним запросом."""
+    placeholders = ', '.join(['%s'] * len(note_ids))
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})',
+            note_ids
+        )
+
+
+def reassign_notes(note_ids, author_id, using='default'):
+    """Меняет владельца пачки заметок в индексе одним запросом."""
+    placeholders = ', '.join(['%s'] * len(note_ids))
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f'UPDATE {FTS_TABLE} SET owner = %s '
+            f'WHERE rowid IN ({placeholders})',
+            [owner_token(author_id), *note_ids]
+        )
+
+
+def clear_index(using='default'):
+    with connections[using].cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+
+
+def build_match(author_id, query):
+    """
+    Выражение MATCH: слова запроса в кавычках, чтобы пользователь
+    не мог передать синтаксис FTS5, плюс ограничение по автору.
+    """
+    words = TOKEN.findall(query)
+    if not words:
+        return None
+    terms = ' '.join(f'"{word}"' for word in words)
+    return f'owner:{owner_token(author_id)} AND {{title text}}: ({terms})'
+
+
+def highlight(snippet):
+    """Экранирует фрагмент и выделяет найденные слова."""
+    return escape(snippet).replace(
+        MATCH_START, '<mark>'
+    ).replace(MATCH_END, '</mark>')
+
+
+def search_notes(author, query, limit):
+    """
+    Заметки автора, подходящие под запрос, по убыванию релевантности.
+
+    У каждой заметки есть атрибут snippet — фрагмент текста
+    с выделенными словами, уже безопасный для вывода в HTML.
+    """
+    match = build_match(author.pk, query)
+    if match is None:
+        return []
+    notes = list(Note.objects.raw(
+        SEARCH_SQL, (MATCH_START, MATCH_END, match, author.pk, limit)
+    ))
+    for note in notes:
+        note.snippet = highlight(note.snippet)
+    return notes
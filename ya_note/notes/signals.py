@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import evict_notes
+from .models import Note
+from .search import index_note, unindex_note
+
+
+@receiver(post_save, sender=Note)
+def update_search_index(
+    sender, instance, created, using, raw=False, **kwargs
+):
+    """Новая или изменённая заметка сразу попадает в поисковый индекс."""
+    if not raw:
+        index_note(instance, created=created, using=using)
+
+
+@receiver(post_delete, sender=Note)
+def remove_from_search_index(sender, instance, using, **kwargs):
+    unindex_note(instance.pk, using=using)
+
+
+@receiver(post_save, sender=Note)
+@receiver(post_delete, sender=Note)
+def evict_note_cache(sender, instance, **kwargs):
+    """
+    Сбрасывает кэш заметки под текущим и прежним slug и автором.
+
+    После сохранения прежним ключом становится текущий.
+    """
+    evict_notes(instance.get_cache_keys())
+    instance.loaded_key = (instance.author_id, instance.slug)
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    """Применяет SQLITE_PRAGMAS к каждому новому соединению с SQLite."""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
@@ -0,0 +1,88 @@
+from functools import lru_cache
+
+from django.conf import settings
+from pytils.translit import slugify
+
+SLUG_MAX_LENGTH = 100
+# Символ, следующий за дефисом: все slug вида base-… меньше base + '.'.
+AFTER_HYPHEN = chr(ord('-') + 1)
+# Символ после всех, допустимых в slug.
+AFTER_SLUG = chr(ord('z') + 1)
+# Самый длинный суффикс, под который укорачивается base: «-» и 9 цифр.
+MAX_TAIL_LENGTH = 10
+
+_cached_slugify = None
+
+
+def _get_cached_slugify():
+    global _cached_slugify
+    if _cached_slugify is None:
+        _cached_slugify = lru_cache(
+            maxsize=settings.NOTES_SLUGIFY_CACHE_SIZE
+        )(slugify)
+    return _cached_slugify
+
+
+def make_slug(title):
+    """
+    Slug из заголовка, обрезанный до длины поля.
+
+    Транслитерация кэшируется: форма и Note.save в одном запросе,
+    а также массовый импорт с повторяющимися заголовками
+    переводят один и тот же заголовок только один раз.
+    """
+    return _get_cached_slugify()(title)[:SLUG_MAX_LENGTH]
+
+
+def slug_cache_info():
+    """Статистика кэша транслитерации: hits, misses, maxsize, currsize."""
+    return _get_cached_slugify().cache_info()
+
+
+def clear_slug_cache():
+    """Сбрасывает кэш, размер из настроек читается при следующем вызове."""
+    global _cached_slugify
+    _cached_slugify = None
+
+
+def slug_with_suffix(base, suffix):
+    tail = f'-{suffix}'
+    return base[:SLUG_MAX_LENGTH - len(tail)] + tail
+
+
+def taken_suffixes(base, exclude_pk=None):
+    """
+    Занят ли сам base и наибольший занятый суффикс base-N.
+
+    Все варианты выбираются одним запросом по диапазону
+    уникального индекса slug, без цикла из проверок exists().
+    Длинный base в вариантах с суффиксом укорочен, поэтому
+    диапазон ищется по base без последних MAX_TAIL_LENGTH символов.
+    """
+    from .models import Note
+
+    stem = base[:SLUG_MAX_LENGTH - MAX_TAIL_LENGTH]
+    upper = base + AFTER_HYPHEN if stem == base else stem + AFTER_SLUG
+    taken = Note.objects.filter(slug__gte=stem, slug__lt=upper)
+    if exclude_pk is not None:
+        taken = taken.exclude(pk=exclude_pk)
+    base_taken = False
+    max_suffix = 1
+    for slug in taken.values_list('slug', flat=True):
+        if slug == base:
+            base_taken = True
+            continue
+        suffix = slug.rpartition('-')[2]
+        if suffix.isdecimal() and slug == slug_with_suffix(
+            base, int(suffix)
+        ):
+            max_suffix = max(max_suffix, int(suffix))
+    return base_taken, max_suffix
+
+
+def unique_slug(base, exclude_pk=None):
+    """Возвращает base или первый свободный вариант base-2, base-3…"""
+    base_taken, max_suffix = taken_suffixes(base, exclude_pk)
+    if not base_taken:
+        return base
+    return slug_with_suffix(base, max_suffix + 1)
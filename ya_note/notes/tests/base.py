@@ -0,0 +1,12 @@
+from django.core.cache import cache
+from django.test import TestCase
+
+
+class NotesTestCase(TestCase):
+    """TestCase, который начинает и заканчивает тест с пустым кэшем."""
+
+    def setUp(self):
+        # Откат транзакции теста не сбрасывает кэш заметок.
+        cache.clear()
+        self.addCleanup(cache.clear)
+        super().setUp()
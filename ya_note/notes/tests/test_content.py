@@ -1,15 +1,25 @@
+import json
+import tracemalloc
+import zipfile
+from http import HTTPStatus
+from io import BytesIO, StringIO
+
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.management import call_command
+from django.test import RequestFactory, override_settings
 from django.urls import reverse
+from django.views import generic
 
 from notes.forms import NoteForm
 from notes.models import Note
+from notes.views import ConditionalGetMixin
+from notes.tests.base import NotesTestCase
 
 
 User = get_user_model()
 
 
-class TestContent(TestCase):
+class TestContent(NotesTestCase):
 
     @classmethod
     def setUpTestData(cls):
@@ -55,3 +65,226 @@ class TestContent(TestCase):
                 response = self.author_client.get(url)
                 self.assertIn('form', response.context)
                 self.assertIsInstance(response.context.get('form'), NoteForm)
+
+    @override_settings(NOTES_COUNT_ON_LIST_PAGE=2)
+    def test_notes_list_is_paginated_by_cursor(self):
+        """
+        Список заметок выводится страницами по курсору,
+        с загрузкой только полей, нужных шаблону.
+        """
+        Note.objects.bulk_create(
+            Note(title=f'Заметка {index}', text='text',
+                 slug=f'note-{index}', author=self.author)
+            for index in range(4)
+        )
+        url = reverse('notes:list')
+        params = {}
+        shown = []
+        while True:
+            # Сессия, пользователь, валидаторы страницы и сама страница.
+            with self.assertNumQueries(4):
+                response = self.author_client.get(url, params)
+            page = response.context['object_list']
+            self.assertLessEqual(len(page), 2)
+            for note in page:
+                self.assertIn('text', note.get_deferred_fields())
+            shown += [note.id for note in page]
+            if not response.context['next_cursor']:
+                break
+            params = {'after': response.context['next_cursor']}
+        expected = list(
+            Note.objects.filter(author=self.author).values_list(
+                'id', flat=True
+            ).order_by('id')
+        )
+        self.assertEqual(shown, expected)
+
+
+class TestSearch(NotesTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Author')
+        cls.not_author = User.objects.create(username='Not author')
+        cls.note = Note.objects.create(
+            title='Рецепт пирога',
+            text='Яблоки, мука и <b>сахар</b>. Печь сорок минут.',
+            slug='pie',
+            author=cls.author
+        )
+        cls.other_note = Note.objects.create(
+            title='Чужой пирог',
+            text='Яблоки и корица.',
+            slug='other-pie',
+            author=cls.not_author
+        )
+        cls.author_client = cls.client_class()
+        cls.author_client.force_login(cls.author)
+        cls.url = reverse('notes:search')
+
+    def search(self, query):
+        response = self.author_client.get(self.url, {'q': query})
+        return list(response.context['object_list'])
+
+    def test_search_finds_only_own_notes(self):
+        """
+        Поиск находит заметки по словам из заголовка и текста
+        и не показывает заметки других пользователей.
+        """
+        for query in ('пирога', 'яблоки', 'ЯБЛОКИ мука'):
+            with self.subTest(query=query):
+                self.assertEqual(self.search(query), [self.note])
+        self.assertEqual(self.search('корица'), [])
+
+    def test_search_snippet_is_escaped_and_highlighted(self):
+        """Фрагмент текста экранирован, найденное слово выделено."""
+        (note,) = self.search('сахар')
+        self.assertIn('<mark>сахар</mark>', note.snippet)
+        self.assertIn('&lt;b&gt;', note.snippet)
+
+    def test_search_syntax_is_not_injected(self):
+        """Синтаксис FTS5 в запросе воспринимается как обычные слова."""
+        for query in ('owner:u1 OR пирог', '"', 'NEAR(', '*'):
+            with self.subTest(query=query):
+                self.search(query)
+
+    def test_index_follows_note_changes(self):
+        """Изменение и удаление заметки сразу видно в поиске."""
+        self.note.text = 'Груши и мёд.'
+        self.note.save()
+        self.assertEqual(self.search('яблоки'), [])
+        self.assertEqual(self.search('груши'), [self.note])
+        self.note.delete()
+        self.assertEqual(self.search('груши'), [])
+
+    def test_rebuild_search_index_command(self):
+        """Команда rebuild_search_index заново строит индекс пачками."""
+        call_command('rebuild_search_index', batch_size=1, stdout=StringIO())
+        self.assertEqual(self.search('пирога'), [self.note])
+
+
+class TestConditionalGet(NotesTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Editor')
+        cls.note = Note.objects.create(
+            title='Заметка', text='Текст', slug='etag', author=cls.author
+        )
+        cls.author_client = cls.client_class()
+        cls.author_client.force_login(cls.author)
+
+    def revalidate(self, url, etag):
+        return self.author_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    def check_cycle(self, url, change):
+        """Изменение — 200 с новым ETag, без изменений — 304."""
+        etag = self.author_client.get(url)['ETag']
+        response = self.revalidate(url, etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        self.assertTemplateNotUsed(response, 'base.html')
+        change()
+        response = self.revalidate(url, etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertNotEqual(response['ETag'], etag)
+        response = self.revalidate(url, response['ETag'])
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def edit_note(self):
+        self.author_client.post(
+            reverse('notes:edit', args=(self.note.slug,)),
+            {'title': 'Новый заголовок', 'text': 'Текст', 'slug': 'etag'}
+        )
+
+    def test_detail_revalidation(self):
+        self.check_cycle(
+            reverse('notes:detail', args=(self.note.slug,)), self.edit_note
+        )
+
+    def test_list_revalidation(self):
+        self.check_cycle(reverse('notes:list'), self.edit_note)
+
+    def test_list_changes_when_note_is_deleted(self):
+        other = Note.objects.create(
+            title='Другая', text='Текст', slug='other', author=self.author
+        )
+        self.check_cycle(reverse('notes:list'), other.delete)
+
+    def test_view_without_validators(self):
+        """Без валидаторов страница отдаётся как обычно, без ETag."""
+        class Page(ConditionalGetMixin, generic.TemplateView):
+            template_name = 'notes/home.html'
+
+        request = RequestFactory().get('/')
+        request.user = self.author
+        response = Page.as_view()(request)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertFalse(response.has_header('ETag'))
+
+
+class TestExport(NotesTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Writer')
+        cls.reader = User.objects.create(username='Reader')
+        cls.note = Note.objects.create(
+            title='Заметка', text='Текст', slug='zametka', author=cls.author
+        )
+        Note.objects.create(
+            title='Чужая', text='Текст', slug='chuzhaya', author=cls.reader
+        )
+        cls.author_client = cls.client_class()
+        cls.author_client.force_login(cls.author)
+
+    def export(self, export_format):
+        response = self.author_client.get(
+            reverse('notes:export', args=(export_format,))
+        )
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content)
+
+    def test_export_jsonl(self):
+        """В выгрузку JSON Lines попадают только заметки автора."""
+        lines = self.export('jsonl').decode().splitlines()
+        self.assertEqual(
+            [json.loads(line) for line in lines],
+            [{'title': 'Заметка', 'text': 'Текст', 'slug': 'zametka'}]
+        )
+
+    def test_export_zip(self):
+        """Архив содержит Markdown-файл на каждую заметку автора."""
+        with zipfile.ZipFile(BytesIO(self.export('zip'))) as archive:
+            self.assertEqual(archive.namelist(), ['zametka.md'])
+            self.assertEqual(
+                archive.read('zametka.md').decode(), '# Заметка\n\nТекст\n'
+            )
+
+    def test_unknown_export_format(self):
+        response = self.author_client.get(
+            reverse('notes:export', args=('xml',))
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_export_memory_does_not_grow_with_notes(self):
+        """
+        Выгрузка 100 тысяч заметок не держит их в памяти:
+        пик заметно меньше размера самой выгрузки.
+        """
+        text = 'Текст заметки. ' * 20
+        Note.objects.bulk_create(
+            Note(title=f'Заметка {index}', text=text, slug=f'note-{index}',
+                 author=self.author)
+            for index in range(100_000)
+        )
+        tracemalloc.start()
+        try:
+            response = self.author_client.get(
+                reverse('notes:export', args=('jsonl',))
+            )
+            size = sum(len(chunk) for chunk in response.streaming_content)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        self.assertGreater(size, 50 * 1024 * 1024)
+        self.assertLess(peak, 10 * 1024 * 1024)
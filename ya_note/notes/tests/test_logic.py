@@ -1,18 +1,37 @@
+import json
+import threading
+from contextlib import contextmanager
 from http import HTTPStatus
+from io import StringIO
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
 
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.contrib.auth.models import Permission
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, connection, connections, transaction
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.db.utils import OperationalError
+from django.test import override_settings
 from django.urls import reverse
 from pytils.translit import slugify
 
+from notes.cache import note_cache_info, reset_note_cache_info
+from notes.fields import CompressedTextField
 from notes.forms import WARNING
 from notes.models import Note
+from notes.search import search_notes
+from notes.slugs import (
+    SLUG_MAX_LENGTH, clear_slug_cache, make_slug, slug_cache_info, unique_slug
+)
+from notes.tests.base import NotesTestCase
 
 
 User = get_user_model()
 
 
-class TestLogic(TestCase):
+class TestLogic(NotesTestCase):
 
     @classmethod
     def setUpTestData(cls):
@@ -69,6 +88,99 @@ class TestLogic(TestCase):
         )
         self.assertEqual(Note.objects.count(), initial_count)
 
+    def test_slug_is_checked_by_unique_index(self):
+        """
+        Занятость slug проверяет уникальный индекс при вставке;
+        запрос exists() нужен только после конфликта.
+        """
+        url = reverse('notes:add')
+        form_data = self.form_data.copy()
+        form_data['slug'] = 'new-slug'
+        # Сессия, пользователь, SAVEPOINT, INSERT,
+        # запись в поисковый индекс, RELEASE SAVEPOINT.
+        with self.assertNumQueries(6):
+            response = self.author_client.post(url, form_data)
+        self.assertRedirects(response, reverse('notes:success'))
+        # При конфликте вместо записи в поисковый индекс —
+        # ROLLBACK TO SAVEPOINT и проверка, что занят именно slug.
+        with self.assertNumQueries(7):
+            response = self.author_client.post(url, form_data)
+        self.assertFormError(
+            response, 'form', 'slug', errors=form_data['slug'] + WARNING
+        )
+
+    def test_other_integrity_errors_are_not_slug_errors(self):
+        """Нарушение другого ограничения не выдаётся за занятый slug."""
+        form_data = self.form_data.copy()
+        form_data['slug'] = 'new-slug'
+        error = IntegrityError('NOT NULL constraint failed: notes_note.text')
+        with patch(
+            'django.views.generic.edit.ModelFormMixin.form_valid',
+            side_effect=error,
+        ):
+            with self.assertRaises(IntegrityError):
+                self.author_client.post(reverse('notes:add'), form_data)
+
+    @override_settings(NOTES_SLUG_AUTO_SUFFIX=True)
+    def test_auto_suffix_for_generated_slug(self):
+        """
+        В режиме автосуффикса одинаковые заголовки без slug
+        получают адреса title, title-2, title-3.
+        """
+        url = reverse('notes:add')
+        form_data = {'title': 'Одинаковый заголовок', 'text': 'Текст'}
+        for _ in range(3):
+            self.author_client.post(url, form_data)
+        expected_slug = slugify(form_data['title'])
+        self.assertEqual(
+            set(Note.objects.filter(
+                title=form_data['title']
+            ).values_list('slug', flat=True)),
+            {expected_slug, f'{expected_slug}-2', f'{expected_slug}-3'}
+        )
+
+    @override_settings(NOTES_SLUG_AUTO_SUFFIX=True)
+    def test_auto_suffix_for_long_title(self):
+        """Суффиксы длинного заголовка укорачивают slug до длины поля."""
+        url = reverse('notes:add')
+        form_data = {'title': ' '.join(['Заголовок'] * 10), 'text': 'Текст'}
+        for _ in range(3):
+            self.author_client.post(url, form_data)
+        base = make_slug(form_data['title'])
+        self.assertEqual(len(base), SLUG_MAX_LENGTH - 1)
+        stem = base[:SLUG_MAX_LENGTH - 2]
+        self.assertEqual(
+            set(Note.objects.filter(
+                title=form_data['title']
+            ).values_list('slug', flat=True)),
+            {base, f'{stem}-2', f'{stem}-3'}
+        )
+
+    @override_settings(NOTES_SLUG_AUTO_SUFFIX=True)
+    def test_auto_suffix_retry_keeps_base(self):
+        """
+        Если подобранный суффикс заняли параллельно, следующий
+        подбирается от исходного slug, а не от занятого варианта.
+        """
+        form_data = {'title': 'Гонка', 'text': 'Текст'}
+        base = make_slug(form_data['title'])
+        Note.objects.create(title='Гонка', slug=base, author=self.author)
+
+        def race(slug, exclude_pk=None):
+            slug = unique_slug(slug, exclude_pk)
+            Note.objects.create(title='Гонка', slug=slug, author=self.author)
+            return slug
+
+        with patch('notes.forms.unique_slug', race):
+            response = self.author_client.post(reverse('notes:add'), form_data)
+        self.assertRedirects(response, reverse('notes:success'))
+        self.assertEqual(
+            set(Note.objects.filter(
+                title='Гонка'
+            ).values_list('slug', flat=True)),
+            {base, f'{base}-2', f'{base}-3'}
+        )
+
     def test_empty_slug(self):
         """
         Если при создании заметки не заполнен slug,
@@ -83,6 +195,18 @@ class TestLogic(TestCase):
         expected_slug = slugify(form_data_empty_slug['title'])
         self.assertEqual(new_note.slug, expected_slug)
 
+    @override_settings(NOTES_SLUGIFY_CACHE_SIZE=2)
+    def test_slug_generation_is_cached(self):
+        """Транслитерация одинаковых заголовков берётся из кэша."""
+        clear_slug_cache()
+        self.addCleanup(clear_slug_cache)
+        titles = ('Заголовок', 'Заголовок', 'Другой', 'Третий', 'Заголовок')
+        for title in titles:
+            self.assertEqual(make_slug(title), slugify(title))
+        info = slug_cache_info()
+        self.assertEqual((info.hits, info.misses), (1, 4))
+        self.assertEqual(info.maxsize, 2)
+
     def test_user_can_edit_own_note(self):
         """Пользователь может редактировать свои заметки."""
         url = reverse('notes:edit', args=(self.note.slug,))
@@ -118,3 +242,489 @@ class TestLogic(TestCase):
         response = self.not_author_client.post(url)
         self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
         self.assertEqual(Note.objects.count(), initial_count)
+
+
+class TestImportNotes(NotesTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Importer')
+        cls.note = Note.objects.create(
+            title='Старая заметка',
+            text='Текст',
+            slug='zametka',
+            author=cls.author
+        )
+
+    def setUp(self):
+        super().setUp()
+        directory = TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+
+    def import_notes(self, path, **options):
+        output = StringIO()
+        call_command(
+            'import_notes', str(path), author=self.author.username,
+            stdout=output, **options
+        )
+        return output.getvalue()
+
+    def test_import_jsonl_dedupes_slugs(self):
+        """
+        Импорт из JSON Lines создаёт заметки пачками
+        и делает slug уникальными и внутри пачки, и относительно базы.
+        """
+        path = self.directory / 'notes.jsonl'
+        records = [{'title': 'Заметка', 'text': f'Импорт {index}'}
+                   for index in range(5)]
+        records.append({'title': 'Своя', 'text': 'Текст', 'slug': 'own'})
+        path.write_text(
+            '\n'.join(json.dumps(record) for record in records),
+            encoding='utf-8'
+        )
+        output = self.import_notes(path, batch_size=2)
+        self.assertIn('Импорт завершён: 6 заметок', output)
+        slugs = set(Note.objects.exclude(
+            pk=self.note.pk
+        ).values_list('slug', flat=True))
+        self.assertEqual(slugs, {
+            'zametka-2', 'zametka-3', 'zametka-4', 'zametka-5', 'zametka-6',
+            'own',
+        })
+        found = search_notes(self.author, 'импорт', limit=10)
+        self.assertEqual(len(found), 5)
+
+    def test_import_checks_slugs(self):
+        """
+        Некорректный slug заменяется slug из заголовка и попадает
+        в отчёт, длинный — обрезается до длины поля.
+        """
+        path = self.directory / 'notes.jsonl'
+        records = [
+            {'title': 'Плохой', 'text': 'Текст', 'slug': 'a b/c'},
+            {'title': 'Длинный', 'text': 'Текст', 'slug': 'x' * 150},
+        ]
+        path.write_text(
+            '\n'.join(json.dumps(record) for record in records),
+            encoding='utf-8'
+        )
+        errors = StringIO()
+        call_command(
+            'import_notes', str(path), author=self.author.username,
+            stdout=StringIO(), stderr=errors
+        )
+        self.assertIn('a b/c', errors.getvalue())
+        self.assertEqual(
+            set(Note.objects.exclude(
+                pk=self.note.pk
+            ).values_list('slug', flat=True)),
+            {slugify('Плохой'), 'x' * SLUG_MAX_LENGTH}
+        )
+
+    def test_import_rejects_empty_batches(self):
+        path = self.directory / 'notes.jsonl'
+        path.write_text('{}', encoding='utf-8')
+        for batch_size in (0, -1):
+            with self.subTest(batch_size=batch_size):
+                with self.assertRaises(CommandError):
+                    self.import_notes(path, batch_size=batch_size)
+
+    def test_import_markdown_directory(self):
+        """Из Markdown заголовок берётся из первой строки «# …»."""
+        (self.directory / 'first.md').write_text(
+            '# Первая\nТекст первой', encoding='utf-8'
+        )
+        (self.directory / 'second.md').write_text(
+            'Без заголовка', encoding='utf-8'
+        )
+        (self.directory / 'skip.txt').write_text('Не заметка')
+        self.import_notes(self.directory)
+        self.assertEqual(
+            dict(Note.objects.exclude(
+                pk=self.note.pk
+            ).values_list('title', 'text')),
+            {'Первая': 'Текст первой', 'second': 'Без заголовка'}
+        )
+
+
+class TestNoteCache(NotesTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Cached')
+        cls.reader = User.objects.create(username='Reader')
+        cls.note = Note.objects.create(
+            title='Заметка', text='Текст', slug='cached', author=cls.author
+        )
+        cls.author_client = cls.client_class()
+        cls.author_client.force_login(cls.author)
+        cls.reader_client = cls.client_class()
+        cls.reader_client.force_login(cls.reader)
+
+    def setUp(self):
+        super().setUp()
+        reset_note_cache_info()
+        self.addCleanup(reset_note_cache_info)
+
+    def detail(self, client, slug):
+        return client.get(reverse('notes:detail', args=(slug,)))
+
+    def test_repeated_lookup_is_served_from_cache(self):
+        """Повторный запрос заметки не обращается к таблице заметок."""
+        with self.assertNumQueries(3):
+            self.detail(self.author_client, self.note.slug)
+        with self.assertNumQueries(2):
+            response = self.detail(self.author_client, self.note.slug)
+        self.assertEqual(response.context['note'], self.note)
+        self.assertEqual(note_cache_info(), (1, 1, 0.5))
+
+    def test_cache_is_per_user(self):
+        """Закэшированная заметка не видна другому пользователю."""
+        self.detail(self.author_client, self.note.slug)
+        response = self.detail(self.reader_client, self.note.slug)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_slug_rename_evicts_old_key(self):
+        """После смены slug старый адрес не отдаётся из кэша."""
+        self.detail(self.author_client, self.note.slug)
+        self.author_client.post(
+            reverse('notes:edit', args=(self.note.slug,)),
+            {'title': 'Новый заголовок', 'text': 'Текст', 'slug': 'renamed'}
+        )
+        response = self.detail(self.author_client, self.note.slug)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+        response = self.detail(self.author_client, 'renamed')
+        self.assertEqual(response.context['note'].title, 'Новый заголовок')
+
+    def test_delete_evicts_note(self):
+        self.detail(self.author_client, self.note.slug)
+        self.author_client.post(
+            reverse('notes:delete', args=(self.note.slug,))
+        )
+        response = self.detail(self.author_client, self.note.slug)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_changes_do_not_use_stale_cache(self):
+        """
+        Если запись в кэше устарела, бывший автор не может
+        ни изменить, ни удалить заметку, а автор не откатывается.
+        """
+        self.detail(self.author_client, self.note.slug)
+        # Перенос в другом процессе: кэш этого процесса не вытеснен.
+        Note.objects.filter(pk=self.note.pk).update(author=self.reader)
+        response = self.author_client.post(
+            reverse('notes:edit', args=(self.note.slug,)),
+            {'title': 'Чужая правка', 'text': 'Текст', 'slug': 'cached'}
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+        response = self.author_client.post(
+            reverse('notes:delete', args=(self.note.slug,))
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+        note = Note.objects.get(pk=self.note.pk)
+        self.assertEqual(
+            (note.author, note.title), (self.reader, 'Заметка')
+        )
+
+    @override_settings(NOTES_CACHE_ALIAS=None)
+    def test_cache_can_be_disabled(self):
+        for _ in range(2):
+            with self.assertNumQueries(3):
+                self.detail(self.author_client, self.note.slug)
+        self.assertEqual(note_cache_info().hits, 0)
+
+
+class TestNotesBatch(NotesTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Cleaner')
+        cls.author.user_permissions.add(
+            Permission.objects.get(codename='move_note')
+        )
+        cls.receiver = User.objects.create(username='Receiver')
+        cls.foreign = Note.objects.create(
+            title='Чужая', text='Текст', slug='foreign', author=cls.receiver
+        )
+        cls.author_client = cls.client_class()
+        cls.author_client.force_login(cls.author)
+
+    def create_notes(self, count):
+        Note.objects.bulk_create(
+            Note(title=f'Заметка {index}', text='Пакетная заметка',
+                 slug=f'batch-{index}', author=self.author)
+            for index in range(count)
+        )
+        call_command('rebuild_search_index', stdout=StringIO())
+        return [f'batch-{index}' for index in range(count)]
+
+    def batch(self, data):
+        return self.author_client.post(
+            reverse('notes:batch'),
+            json.dumps(data),
+            content_type='application/json',
+        )
+
+    def test_batch_delete(self):
+        """Удаляются только свои заметки, результат есть для каждого slug."""
+        slugs = self.create_notes(3)
+        response = self.batch(
+            {'action': 'delete', 'slugs': slugs + ['foreign', 'missing']}
+        )
+        self.assertEqual(response.json()['results'], {
+            **dict.fromkeys(slugs, 'deleted'),
+            'foreign': 'not_found',
+            'missing': 'not_found',
+        })
+        self.assertFalse(Note.objects.filter(author=self.author).exists())
+        self.assertTrue(Note.objects.filter(slug='foreign').exists())
+        self.assertEqual(search_notes(self.author, 'пакетная', 10), [])
+
+    def test_batch_move(self):
+        """Заметки переходят к другому пользователю вместе с поиском."""
+        slugs = self.create_notes(2)
+        response = self.batch(
+            {'action': 'move', 'slugs': slugs, 'to': 'Receiver'}
+        )
+        self.assertEqual(
+            response.json()['results'], dict.fromkeys(slugs, 'moved')
+        )
+        self.assertEqual(
+            Note.objects.filter(author=self.receiver).count(), 3
+        )
+        self.assertEqual(search_notes(self.author, 'пакетная', 10), [])
+        self.assertEqual(len(search_notes(self.receiver, 'пакетная', 10)), 2)
+
+    def test_moved_note_is_evicted_from_cache(self):
+        (slug,) = self.create_notes(1)
+        url = reverse('notes:detail', args=(slug,))
+        self.author_client.get(url)
+        self.batch({'action': 'move', 'slugs': [slug], 'to': 'Receiver'})
+        response = self.author_client.get(url)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    @override_settings(NOTES_BATCH_CHUNK_SIZE=50)
+    def test_batch_query_count_does_not_grow_per_note(self):
+        """Число запросов зависит от числа пачек, а не заметок."""
+        slugs = self.create_notes(50)
+        for action, data in (
+            ('move', {'to': 'Receiver'}),
+            ('delete', {}),
+        ):
+            for count in (1, 50):
+                with self.subTest(action=action, count=count):
+                    Note.objects.filter(slug__in=slugs).update(
+                        author=self.author
+                    )
+                    call_command('rebuild_search_index', stdout=StringIO())
+                    # Сессия, пользователь, при переносе — права
+                    # пользователя и его групп и получатель,
+                    # проверка владельца, SAVEPOINT, изменение заметок,
+                    # изменение индекса, RELEASE SAVEPOINT.
+                    expected = 10 if action == 'move' else 7
+                    with self.assertNumQueries(expected):
+                        self.batch(
+                            {'action': action, 'slugs': slugs[:count],
+                             **data}
+                        )
+
+    def test_bad_request(self):
+        for data in (
+            {'action': 'archive', 'slugs': []},
+            {'action': 'delete', 'slugs': 'batch-0'},
+            {'action': 'move', 'slugs': [], 'to': 'Nobody'},
+            {'action': 'move', 'slugs': []},
+            {'action': 'move', 'slugs': [], 'to': 'Cleaner'},
+            [],
+        ):
+            with self.subTest(data=data):
+                response = self.batch(data)
+                self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
+    def test_move_requires_permission(self):
+        """Без права move_note чужому пользователю заметки не передать."""
+        self.author.user_permissions.clear()
+        (slug,) = self.create_notes(1)
+        response = self.batch(
+            {'action': 'move', 'slugs': [slug], 'to': 'Receiver'}
+        )
+        self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
+        self.assertEqual(Note.objects.get(slug=slug).author, self.author)
+
+    def test_purge_user_command(self):
+        """purge_user удаляет заметки пачками, затем пользователя."""
+        self.create_notes(5)
+        output = StringIO()
+        call_command(
+            'purge_user', self.author.username, chunk_size=2, stdout=output
+        )
+        self.assertIn('Удалено заметок: 4\nУдалено заметок: 5\n',
+                      output.getvalue())
+        self.assertFalse(User.objects.filter(pk=self.author.pk).exists())
+        self.assertEqual(list(Note.objects.all()), [self.foreign])
+        self.assertEqual(search_notes(self.author, 'пакетная', 10), [])
+
+
+class TestCompressedText(NotesTestCase):
+
+    LONG_TEXT = 'Длинная заметка про яблоки. ' * 500
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Writer')
+        cls.long_note = Note.objects.create(
+            title='Длинная', text=cls.LONG_TEXT, slug='long',
+            author=cls.author
+        )
+        cls.short_note = Note.objects.create(
+            title='Короткая', text='Коротко', slug='short',
+            author=cls.author
+        )
+
+    def stored(self, note):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT typeof(text), length(text) FROM notes_note '
+                'WHERE id = %s', (note.pk,)
+            )
+            return cursor.fetchone()
+
+    def test_long_text_is_compressed(self):
+        """Длинный текст хранится сжатым, короткий — строкой."""
+        kind, size = self.stored(self.long_note)
+        self.assertEqual(kind, 'blob')
+        self.assertLess(size, len(self.LONG_TEXT.encode()) / 10)
+        self.assertEqual(self.stored(self.short_note), ('text', 7))
+
+    def test_text_is_decompressed_on_read(self):
+        self.assertEqual(
+            Note.objects.get(pk=self.long_note.pk).text, self.LONG_TEXT
+        )
+        self.assertEqual(
+            Note.objects.filter(slug='long').values_list(
+                'text', flat=True
+            ).get(),
+            self.LONG_TEXT
+        )
+        self.assertEqual(search_notes(self.author, 'яблоки', 10),
+                         [self.long_note])
+
+    def test_lzma_round_trip(self):
+        field = CompressedTextField(threshold=10, algorithm='lzma')
+        stored = field.get_db_prep_value(self.LONG_TEXT, connection)
+        self.assertTrue(stored.startswith(b'x'))
+        self.assertEqual(
+            field.from_db_value(stored, None, connection), self.LONG_TEXT
+        )
+
+    def test_unknown_marker_is_returned_as_is(self):
+        field = CompressedTextField()
+        for stored in (b'?raw text', b'zbroken'):
+            with self.subTest(stored=stored):
+                self.assertEqual(
+                    field.from_db_value(stored, None, connection),
+                    stored.decode()
+                )
+
+
+class TestSQLiteTuning(NotesTestCase):
+
+    def test_file_connection_is_tuned(self):
+        """К новому соединению с файлом базы применяются SQLITE_PRAGMAS."""
+        with TemporaryDirectory() as directory:
+            database = DatabaseWrapper({
+                **connection.settings_dict,
+                'NAME': str(Path(directory) / 'db.sqlite3'),
+            }, alias='file')
+            with database.cursor() as cursor:
+                pragmas = {}
+                for name in ('journal_mode', 'synchronous', 'busy_timeout'):
+                    cursor.execute(f'PRAGMA {name}')
+                    pragmas[name] = cursor.fetchone()[0]
+            database.close()
+        # Режим WAL включает миграция, а не каждое соединение.
+        self.assertEqual(pragmas, {
+            'journal_mode': 'delete', 'synchronous': 1, 'busy_timeout': 5000
+        })
+
+    @contextmanager
+    def migrated_database(self):
+        """Файловая база под псевдонимом file, собранная migrate."""
+        with TemporaryDirectory() as directory:
+            connections.databases['file'] = {
+                **connection.settings_dict,
+                'NAME': str(Path(directory) / 'db.sqlite3'),
+            }
+            try:
+                call_command('migrate', database='file', verbosity=0)
+                yield 'file'
+            finally:
+                connections['file'].close()
+                del connections['file']
+                del connections.databases['file']
+
+    def test_migrate_enables_wal(self):
+        """После migrate файл базы работает в режиме WAL."""
+        with self.migrated_database() as alias:
+            with connections[alias].cursor() as cursor:
+                cursor.execute('PRAGMA journal_mode')
+                journal_mode = cursor.fetchone()[0]
+        self.assertEqual(journal_mode, 'wal')
+
+    def write_notes(self, alias, author, batches, batch_size, errors,
+                    writing):
+        try:
+            for batch in range(batches):
+                with transaction.atomic(using=alias):
+                    Note.objects.using(alias).bulk_create(
+                        Note(title='Заметка', text='Текст',
+                             slug=f'note-{batch}-{index}', author=author)
+                        for index in range(batch_size)
+                    )
+        except OperationalError as error:
+            errors.append(error)
+        finally:
+            writing.clear()
+            connections[alias].close()
+
+    def read_notes(self, alias, errors, writing):
+        try:
+            # Читатель не ждёт писателя: любая блокировка сразу ошибка.
+            with connections[alias].cursor() as cursor:
+                cursor.execute('PRAGMA busy_timeout = 0')
+            while writing.is_set():
+                Note.objects.using(alias).count()
+        except OperationalError as error:
+            errors.append(error)
+        finally:
+            connections[alias].close()
+
+    def test_readers_are_not_locked_by_writer(self):
+        """
+        В базе после migrate, пока один поток пишет заметки,
+        читающие потоки не получают блокировку.
+        """
+        batches, batch_size = 50, 100
+        errors = []
+        writing = threading.Event()
+        writing.set()
+        with self.migrated_database() as alias:
+            author = User.objects.using(alias).create(username='Writer')
+            threads = [
+                threading.Thread(
+                    target=self.read_notes, args=(alias, errors, writing)
+                )
+                for _ in range(4)
+            ]
+            threads.append(threading.Thread(
+                target=self.write_notes,
+                args=(alias, author, batches, batch_size, errors, writing),
+            ))
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            count = Note.objects.using(alias).count()
+        self.assertEqual(errors, [])
+        self.assertEqual(count, batches * batch_size)
@@ -1,16 +1,16 @@
 from http import HTTPStatus
 
 from django.contrib.auth import get_user_model
-from django.test import TestCase
 from django.urls import reverse
 
 from notes.models import Note
+from notes.tests.base import NotesTestCase
 
 
 User = get_user_model()
 
 
-class TestRoutes(TestCase):
+class TestRoutes(NotesTestCase):
 
     @classmethod
     def setUpTestData(cls):
@@ -88,3 +88,11 @@ class TestRoutes(TestCase):
                     url = reverse(name, args=(self.note.slug,))
                     response = user.get(url)
                     self.assertEqual(response.status_code, status)
+
+    def test_bad_list_cursor_returns_not_found(self):
+        """Некорректный курсор списка заметок возвращает ошибку 404."""
+        url = reverse('notes:list')
+        for after in ('abc', '²', '-1', str(2 ** 63)):
+            with self.subTest(after=after):
+                response = self.author_client.get(url, {'after': after})
+                self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
@@ -11,5 +11,12 @@ urlpatterns = [
     path('note/<slug:slug>/', views.NoteDetail.as_view(), name='detail'),
     path('delete/<slug:slug>/', views.NoteDelete.as_view(), name='delete'),
     path('notes/', views.NotesList.as_view(), name='list'),
+    path(
+        'export/<str:export_format>/',
+        views.NotesExport.as_view(),
+        name='export'
+    ),
+    path('batch/', views.NotesBatch.as_view(), name='batch'),
+    path('search/', views.NoteSearch.as_view(), name='search'),
     path('done/', views.NoteSuccess.as_view(), name='success'),
 ]
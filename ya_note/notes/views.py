@@ -1,9 +1,29 @@
+import json
+from http import HTTPStatus
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.db import IntegrityError, transaction
+from django.db.models import Max, Sum
+from django.http import Http404, JsonResponse, StreamingHttpResponse
 from django.urls import reverse_lazy
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
 from django.views import generic
 
+from .batch import DELETED, MOVED, apply_batch
+from .cache import get_note
+from .export import export_jsonl, export_zip, iter_notes
 from .forms import NoteForm
-from .models import Note
+from .models import Note, NoteRow
+from .search import search_notes
+from .slugs import unique_slug
+
+# Наибольший id, который помещается в целое число SQLite.
+MAX_NOTE_ID = 2 ** 63 - 1
+# Сколько раз подбирать свободный суффикс, если slug заняли параллельно.
+SLUG_ATTEMPTS = 3
 
 
 class Home(generic.TemplateView):
@@ -25,23 +45,118 @@ class NoteBase(LoginRequiredMixin):
         """Пользователь может работать только со своими заметками."""
         return self.model.objects.filter(author=self.request.user)
 
+    def get_object(self, queryset=None):
+        """
+        Заметка по slug и автору через кэш заметок.
+
+        Запросы, которые меняют заметку, читают её из базы: запись
+        в кэше может устареть, например после переноса заметки
+        к другому автору, и сохранять её нельзя.
+        """
+        if queryset is not None or self.request.method not in (
+            'GET', 'HEAD'
+        ):
+            return super().get_object(queryset)
+        return get_note(
+            self.request.user.pk,
+            self.kwargs[self.slug_url_kwarg],
+            super().get_object,
+        )
+
+
+class ConditionalGetMixin:
+    """
+    Отвечает 304, если страница не менялась, не собирая шаблон.
+
+    Валидаторы строятся по полю Note.updated_at,
+    которое обновляется при каждом сохранении заметки.
+    """
+
+    def get_validators(self):
+        """
+        Время изменения страницы и её ключ для ETag.
+
+        Переопределяется в представлении. None — валидаторов нет,
+        страница отдаётся как обычно.
+        """
+        return None
+
+    def get_etag_owner(self):
+        # Страница зависит от пользователя: его имя выводится в шапке.
+        # Форм с токеном CSRF на страницах с ETag нет.
+        return str(self.request.user.pk)
+
+    def get_page(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+    def get(self, request, *args, **kwargs):
+        validators = self.get_validators()
+        if validators is None:
+            return self.get_page(request, *args, **kwargs)
+        last_modified, key = validators
+        etag = quote_etag(
+            f'{key}-{last_modified.timestamp()}-{self.get_etag_owner()}'
+        )
+        timestamp = int(last_modified.timestamp())
+        response = get_conditional_response(
+            request, etag=etag, last_modified=timestamp
+        )
+        if response is None:
+            response = self.get_page(request, *args, **kwargs)
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(timestamp)
+        patch_vary_headers(response, ('Cookie',))
+        return response
 
-class NoteCreate(NoteBase, generic.CreateView):
+
+class NoteFormMixin:
+    """
+    Сохранение заметки с проверкой slug уникальным индексом.
+
+    Занятый slug обнаруживается по IntegrityError при вставке.
+    Автоматически созданный slug в режиме NOTES_SLUG_AUTO_SUFFIX
+    получает следующий свободный суффикс, остальные — ошибку формы.
+    IntegrityError из-за другого ограничения пробрасывается дальше.
+    """
+    form_class = NoteForm
+
+    def slug_taken(self, note):
+        """Slug заметки занят другой заметкой."""
+        return Note.objects.filter(slug=note.slug).exclude(
+            pk=note.pk
+        ).exists()
+
+    def form_valid(self, form):
+        for _ in range(SLUG_ATTEMPTS):
+            try:
+                with transaction.atomic():
+                    return super().form_valid(form)
+            except IntegrityError:
+                if not self.slug_taken(form.instance):
+                    raise
+                if not (
+                    form.slug_generated and settings.NOTES_SLUG_AUTO_SUFFIX
+                ):
+                    break
+                form.instance.slug = unique_slug(
+                    form.slug_base, exclude_pk=form.instance.pk
+                )
+        form.add_slug_error()
+        return self.form_invalid(form)
+
+
+class NoteCreate(NoteBase, NoteFormMixin, generic.CreateView):
     """Добавление заметки."""
     template_name = 'notes/form.html'
-    form_class = NoteForm
 
     def form_valid(self, form):
-        new_note = form.save(commit=False)
-        new_note.author = self.request.user
-        new_note.save()
+        form.instance.author = self.request.user
         return super().form_valid(form)
 
 
-class NoteUpdate(NoteBase, generic.UpdateView):
+class NoteUpdate(NoteBase, NoteFormMixin, generic.UpdateView):
     """Редактирование заметки."""
     template_name = 'notes/form.html'
-    form_class = NoteForm
 
 
 class NoteDelete(NoteBase, generic.DeleteView):
@@ -49,11 +164,164 @@ class NoteDelete(NoteBase, generic.DeleteView):
     template_name = 'notes/delete.html'
 
 
-class NotesList(NoteBase, generic.ListView):
+class NotesList(NoteBase, ConditionalGetMixin, generic.ListView):
     """Список всех заметок пользователя."""
     template_name = 'notes/list.html'
 
+    def get_queryset(self):
+        """
+        Заметки после курсора в порядке id.
 
-class NoteDetail(NoteBase, generic.DetailView):
+        Загружаем только поля, которые выводит шаблон,
+        а страницу берём по индексу (author, id) без OFFSET.
+        """
+        queryset = super().get_queryset().only(
+            'id', 'slug', 'title'
+        ).order_by('id')
+        after = self.request.GET.get('after')
+        if after is not None:
+            try:
+                after = int(after)
+            except ValueError:
+                raise Http404('Некорректный курсор')
+            if not 0 <= after <= MAX_NOTE_ID:
+                raise Http404('Некорректный курсор')
+            queryset = queryset.filter(id__gt=after)
+        return queryset
+
+    def get_validators(self):
+        """
+        Валидаторы считаем только по заметкам этой страницы.
+
+        Сумма их id меняется, когда заметку удаляют или добавляют
+        на страницу, даже если время изменения осталось прежним.
+        """
+        per_page = settings.NOTES_COUNT_ON_LIST_PAGE
+        validators = self.get_queryset()[:per_page + 1].aggregate(
+            updated_at=Max('updated_at'), ids=Sum('id')
+        )
+        if validators['updated_at'] is None:
+            return None
+        return validators['updated_at'], f'list-{validators["ids"]}'
+
+    def get_context_data(self, **kwargs):
+        per_page = settings.NOTES_COUNT_ON_LIST_PAGE
+        notes = list(self.object_list[:per_page + 1])
+        next_cursor = notes[per_page - 1].id if len(notes) > per_page else None
+        return super().get_context_data(
+            object_list=notes[:per_page], next_cursor=next_cursor, **kwargs
+        )
+
+
+class NotesExport(NoteBase, generic.View):
+    """
+    Выгрузка всех заметок пользователя.
+
+    Ответ отдаётся потоком, а заметки читаются из базы кусками,
+    поэтому расход памяти не зависит от числа заметок.
+    """
+    formats = {
+        'jsonl': (export_jsonl, 'application/x-ndjson'),
+        'zip': (export_zip, 'application/zip'),
+    }
+
+    def get(self, request, export_format):
+        if export_format not in self.formats:
+            raise Http404('Неизвестный формат выгрузки')
+        export, content_type = self.formats[export_format]
+        notes = iter_notes(
+            self.get_queryset(), settings.NOTES_EXPORT_CHUNK_SIZE
+        )
+        response = StreamingHttpResponse(
+            export(notes), content_type=content_type
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="notes.{export_format}"'
+        )
+        return response
+
+
+class NotesBatch(NoteBase, generic.View):
+    """
+    Удаление или передача другому пользователю сразу многих заметок.
+
+    Принимает JSON вида {"action": "delete" | "move", "slugs": [...],
+    "to": "имя пользователя"} и возвращает результат для каждого slug.
+    Чужие и несуществующие заметки получают результат not_found.
+    Получатель не подтверждает передачу, поэтому передавать заметки
+    могут только пользователи с правом notes.move_note.
+    """
+    # Заметки меняются пачками без сигналов: индекс и кэш
+    # обновляет apply_batch.
+    model = NoteRow
+    actions = {'delete': DELETED, 'move': MOVED}
+
+    def error(self, message):
+        return JsonResponse(
+            {'error': message}, status=HTTPStatus.BAD_REQUEST
+        )
+
+    def post(self, request):
+        try:
+            data = json.loads(request.body)
+            action = self.actions[data['action']]
+            slugs = data['slugs']
+            if not isinstance(slugs, list):
+                raise TypeError
+            slugs = [str(slug) for slug in slugs]
+        except (ValueError, TypeError, KeyError):
+            return self.error('Ожидается JSON с полями action и slugs.')
+        author = None
+        if action == MOVED:
+            if not request.user.has_perm('notes.move_note'):
+                return JsonResponse(
+                    {'error': 'Нет права передавать заметки.'},
+                    status=HTTPStatus.FORBIDDEN,
+                )
+            if not data.get('to'):
+                return self.error('Не указан получатель.')
+            try:
+                author = get_user_model().objects.get(username=data['to'])
+            except get_user_model().DoesNotExist:
+                return self.error('Получатель не найден.')
+            if author.pk == request.user.pk:
+                return self.error('Нельзя передать заметки самому себе.')
+        results = apply_batch(
+            self.get_queryset(),
+            slugs,
+            action,
+            settings.NOTES_BATCH_CHUNK_SIZE,
+            author=author,
+        )
+        return JsonResponse({'results': results})
+
+
+class NoteSearch(NoteBase, generic.ListView):
+    """Полнотекстовый поиск по заметкам пользователя."""
+    template_name = 'notes/search.html'
+
+    def get_queryset(self):
+        return search_notes(
+            self.request.user,
+            self.request.GET.get('q', ''),
+            settings.NOTES_SEARCH_RESULTS_LIMIT,
+        )
+
+    def get_context_data(self, **kwargs):
+        return super().get_context_data(
+            query=self.request.GET.get('q', ''), **kwargs
+        )
+
+
+class NoteDetail(NoteBase, ConditionalGetMixin, generic.DetailView):
     """Заметка подробно."""
     template_name = 'notes/detail.html'
+
+    def get_validators(self):
+        """Заметка уже загружена, поэтому проверка не стоит запроса."""
+        self.object = self.get_object()
+        return self.object.updated_at, f'note-{self.object.pk}'
+
+    def get_page(self, request, *args, **kwargs):
+        context = self.get_context_data(object=self.object)
+        return self.render_to_response(context)
@@ -56,6 +56,27 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Соединение живёт между запросами, а не открывается заново.
+        'CONN_MAX_AGE': 60,
+    }
+}
+
+# PRAGMA для каждого нового соединения с SQLite: busy_timeout (мс)
+# ждёт освобождения базы вместо ошибки «database is locked»,
+# cache_size < 0 — размер в КБ. Режим WAL, в котором читатели
+# не ждут писателя, хранится в самом файле базы и включается
+# один раз миграцией, а не при каждом соединении.
+SQLITE_PRAGMAS = {
+    'busy_timeout': 5000,
+    'synchronous': 'normal',
+    'cache_size': -20000,
+    'mmap_size': 128 * 2 ** 20,
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache',
     }
 }
 
@@ -87,3 +108,18 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('notes:home')
+
+NOTES_COUNT_ON_LIST_PAGE = 100
+# Если slug не указан и уже занят, подбирать свободный: title-2, title-3…
+NOTES_SLUG_AUTO_SUFFIX = False
+# Сколько заголовков держать в кэше транслитерации для slug.
+NOTES_SLUGIFY_CACHE_SIZE = 4096
+NOTES_SEARCH_RESULTS_LIMIT = 50
+# Сколько заметок читать из базы за раз при выгрузке.
+NOTES_EXPORT_CHUNK_SIZE = 2000
+# Кэш заметок по (автор, slug); бэкенд должен быть общим для всех
+# процессов, иначе вытеснение видит только один из них. None отключает кэш.
+NOTES_CACHE_ALIAS = 'default'
+NOTES_CACHE_TIMEOUT = 300
+# Сколько slug обрабатывать одним запросом в пакетных операциях.
+NOTES_BATCH_CHUNK_SIZE = 500